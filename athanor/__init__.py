@@ -1,5 +1,7 @@
-from django.dispatch import Signal
+import os
+import tracemalloc
 from collections import defaultdict
+from .events import BUS, EventSignals
 
 CHARACTERS_ONLINE = set()
 
@@ -20,7 +22,28 @@ SCRIPT_ACCESS_FUNCTIONS = defaultdict(list)
 ACCOUNT_ACCESS_FUNCTIONS = defaultdict(list)
 CHANNEL_ACCESS_FUNCTIONS = defaultdict(list)
 
-EVENTS: dict[str, Signal] = defaultdict(Signal)
+# Django Signal-style access to the event bus. New code should use emit()/register_event().
+EVENTS = EventSignals(BUS)
+
+
+def emit(event: str, *args, **kwargs) -> list:
+    """
+    Call every handler registered for event. See athanor.events.EventBus.emit().
+    """
+    return BUS.emit(event, *args, **kwargs)
+
+
+def register_event(event: str, handler, priority: int = 0, **kwargs):
+    """
+    Register handler for event. Handlers with a higher priority run first. Pass sender=obj to
+    only receive events emitted with that sender, and mode="deferred" or mode="thread" to run the
+    handler after emit() returns instead of inside it.
+    """
+    BUS.register(event, handler, priority=priority, **kwargs)
+
+
+def unregister_event(event: str, handler=None, **kwargs) -> bool:
+    return BUS.unregister(event, handler, **kwargs)
 
 OBJECT_OBJECT_DEFAULT_LOCKS = defaultdict(list)
 OBJECT_CHARACTER_DEFAULT_LOCKS = defaultdict(list)
@@ -192,7 +215,59 @@ def _apply_settings(settings):
     # This is also how many seconds will be added to playtime.
     settings.PLAYTIME_INTERVAL = 1
 
-
+    # Login/logout timestamps are written from a thread pool so puppeting doesn't wait on the
+    # database. Writes for the same account or character still happen in order. Set this to False
+    # to write them immediately instead.
+    settings.PLAYTIME_WRITES_ASYNC = True
+    settings.PLAYTIME_WRITER_WORKERS = 2
+
+    # Playtime is also recorded per day (and per hour if PLAYTIME_HISTORY_HOURLY) for leaderboards.
+    # The totals are kept in memory and written every PLAYTIME_HISTORY_FLUSH_INTERVAL seconds.
+    settings.PLAYTIME_HISTORY_HOURLY = True
+    settings.PLAYTIME_HISTORY_FLUSH_INTERVAL = 60
+
+    # athanor.login.retention.apply_retention_policy() folds LoginRecords older than this many days
+    # into daily LoginSummary rows and deletes them. None keeps every record forever. If
+    # LOGIN_ARCHIVE_DIR is set, the deleted records are first exported there as .jsonl.gz files.
+    settings.LOGIN_RETENTION_DAYS = None
+    settings.LOGIN_RETENTION_CHUNK_SIZE = 5000
+    settings.LOGIN_ARCHIVE_DIR = None
+
+    # Hosts seen at login get their hostname filled in by reverse DNS, in a background thread pool.
+    # The backend is a callable taking an IP and returning a hostname or None. Results are cached
+    # for HOSTNAME_RESOLVER_TTL seconds, and failed lookups for HOSTNAME_RESOLVER_NEGATIVE_TTL.
+    settings.HOSTNAME_RESOLVER_ENABLED = True
+    settings.HOSTNAME_RESOLVER_BACKEND = "athanor.login.resolver.socket_backend"
+    settings.HOSTNAME_RESOLVER_WORKERS = 4
+    settings.HOSTNAME_RESOLVER_TTL = 86400
+    settings.HOSTNAME_RESOLVER_NEGATIVE_TTL = 3600
+
+    # Online characters keep their last MESSAGE_JOURNAL_DEPTH received lines in memory (see
+    # athanor.journal.journal.JOURNAL.recent()). With MESSAGE_JOURNAL_PERSIST, the lines are also
+    # saved to the database in batches every MESSAGE_JOURNAL_FLUSH_INTERVAL seconds. Saved lines
+    # are kept until athanor.journal.journal.prune() deletes them, so games enabling it should
+    # call that periodically.
+    settings.MESSAGE_JOURNAL_ENABLED = True
+    settings.MESSAGE_JOURNAL_DEPTH = 200
+    settings.MESSAGE_JOURNAL_PERSIST = False
+    settings.MESSAGE_JOURNAL_FLUSH_INTERVAL = 5
+
+    # Parsed YAML data files (athanor.utils.read_data_file() and friends) are cached here, keyed by
+    # each file's modification time and size. None disables the cache.
+    settings.DATA_FILE_CACHE_DIR = os.path.join(settings.GAME_DIR, "server", ".datacache")
+    # athanor.utils.import_data_directory() parses files in this many processes. None means one per
+    # CPU.
+    settings.DATA_IMPORT_WORKERS = None
+
+    # If True, athanor.finalize() imports the modules plugins declared (CMD_MODULES_*, handlers,
+    # access functions, PRELOAD_MODULES) in a background thread pool while the rest of startup runs.
+    settings.ATHANOR_PRELOAD_MODULES = False
+    settings.ATHANOR_PRELOAD_WORKERS = 4
+
+    # Event handlers registered with mode="thread" run on this many worker threads. When the queue
+    # is full, further calls are dropped and counted (see athanor.events.BUS.report()).
+    settings.ATHANOR_EVENT_WORKERS = 2
+    settings.ATHANOR_EVENT_QUEUE_SIZE = 10000
 
     settings.PERMISSION_HIERARCHY = [
         "Guest",  # note-only used if GUEST_ENABLED=True
@@ -205,31 +280,110 @@ def _apply_settings(settings):
     ]
 
 
-def init(settings, plugins=None):
-    _apply_settings(settings)
+def init(settings, plugins=None, profile_memory=False, settings_cache=None):
+    """
+    Compose Athanor's settings and load plugins.
+
+    Plugins are initialized in dependency order. A plugin module may declare `depends_on` (a list of
+    plugin or capability names) and `provides` (a list of capability names).
+
+    Args:
+        settings (module): The game's settings module.
+        plugins (list[str]): Python paths of plugin modules.
+        profile_memory (bool): If True, tracemalloc is enabled so the startup report includes
+            per-plugin memory deltas. This slows startup down noticeably.
+        settings_cache (str or Path, optional): A file in which to store the settings the plugins
+            composed. If every plugin sets SETTINGS_CACHEABLE = True and nothing that feeds into
+            composition (settings, any Python file in athanor or a plugin's package, or a file
+            listed in a plugin's SETTINGS_DATA_FILES) has changed since it was written, the cached settings are applied and no plugin init/post_init is called.
+    """
+    from .plugins import PROFILER, SettingsCache, settings_fingerprint, sort_plugins
+    from .plugins import _settings_state, _Uncacheable
+
+    if profile_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+    with PROFILER.measure("athanor", "init"):
+        _apply_settings(settings)
 
     if plugins is None:
         plugins = list()
 
     from importlib import import_module
 
-    call_order = list()
+    modules = dict()
     for plugin in plugins:
-        module = import_module(plugin)
+        with PROFILER.measure(plugin, "import"):
+            modules[plugin] = import_module(plugin)
 
+    call_order = list()
+    for plugin in sort_plugins(modules):
+        module = modules[plugin]
         if hasattr(module, "init"):
             PLUGINS[plugin] = module
-            call_order.append(module)
-
-    for p in call_order:
-        p.init(settings, PLUGINS)
-
-    for p in call_order:
+            call_order.append((plugin, module))
+
+    cache = None
+    if settings_cache and all(
+        getattr(m, "SETTINGS_CACHEABLE", False) for m in modules.values()
+    ):
+        try:
+            before = _settings_state(settings)
+        except _Uncacheable:
+            before = None
+        if before is not None:
+            # never sign the caches themselves.
+            skip = [settings_cache, getattr(settings, "DATA_FILE_CACHE_DIR", None)]
+            fingerprint = settings_fingerprint(
+                before, [m for _n, m in call_order], skip=[p for p in skip if p]
+            )
+            cache = SettingsCache(settings_cache)
+            if (cached := cache.load(fingerprint)) is not None:
+                for k, v in cached.items():
+                    setattr(settings, k, v)
+                return
+
+    for name, p in call_order:
+        with PROFILER.measure(name, "init"):
+            p.init(settings, PLUGINS)
+
+    for name, p in call_order:
         if callable((post_init := getattr(p, "post_init", None))):
-            post_init(settings, PLUGINS)
+            with PROFILER.measure(name, "post_init"):
+                post_init(settings, PLUGINS)
+
+    if cache:
+        cache.save(fingerprint, settings, before)
 
 
 def finalize(settings):
-    for p in PLUGINS.values():
+    from .plugins import PROFILER, collect_preload_modules
+
+    BUS.threaded.configure(
+        workers=settings.ATHANOR_EVENT_WORKERS,
+        max_queue=settings.ATHANOR_EVENT_QUEUE_SIZE,
+    )
+
+    if settings.ATHANOR_PRELOAD_MODULES:
+        PROFILER.preload(
+            collect_preload_modules(settings, PLUGINS),
+            max_workers=settings.ATHANOR_PRELOAD_WORKERS,
+        )
+
+    for name, p in PLUGINS.items():
         if callable((finalize := getattr(p, "finalize", None))):
-            finalize(settings, PLUGINS)
+            with PROFILER.measure(name, "finalize"):
+                finalize(settings, PLUGINS)
+
+    # the preloads overlap with the plugins' finalize(); everything that uses the modules
+    # (cmdsets, lock functions) comes later, so the imports only need to be done by now.
+    PROFILER.wait_for_preload()
+
+
+def startup_report() -> str:
+    """
+    Returns a table of how long each plugin took to import, init, post_init and finalize.
+    """
+    from .plugins import PROFILER
+
+    return PROFILER.report()
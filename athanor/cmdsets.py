@@ -0,0 +1,115 @@
+"""
+Athanor's default cmdsets.
+
+Each cmdset is Evennia's default plus the commands found in the matching settings.CMD_MODULES_<TYPE>
+list and the cmdsets named in settings.CMDSETS_<TYPE>_EXTRA.
+"""
+import typing
+
+from django.conf import settings
+from evennia.commands.command import Command
+from evennia.commands.default import cmdset_account, cmdset_character
+from evennia.commands.default import cmdset_session, cmdset_unloggedin
+from evennia.utils.utils import callables_from_module, class_from_module
+
+
+class CommandRegistry:
+    """
+    Collects the commands from each CMD_MODULES_<TYPE> list once per process.
+
+    Cmdsets used to import every module and re-run callables_from_module() every time they were
+    built, for every puppet and account. The registry does that once and hands out the resulting
+    tuple of command classes, along with an index of every key and alias.
+    """
+
+    def __init__(self):
+        self._commands: dict[str, tuple[type, ...]] = dict()
+        self._index: dict[str, dict[str, type]] = dict()
+
+    def _collect(self, cmd_type: str) -> tuple[type, ...]:
+        out = dict()
+        for path in getattr(settings, f"CMD_MODULES_{cmd_type}", list()):
+            for cmd in callables_from_module(path).values():
+                if isinstance(cmd, type) and issubclass(cmd, Command):
+                    out[cmd.key] = cmd
+        return tuple(out.values())
+
+    def commands(self, cmd_type: str) -> tuple[type, ...]:
+        """
+        The command classes for a cmdset type such as "CHARACTER" or "ACCOUNT".
+        """
+        if (found := self._commands.get(cmd_type, None)) is None:
+            found = self._commands[cmd_type] = self._collect(cmd_type)
+        return found
+
+    def index(self, cmd_type: str) -> dict[str, type]:
+        """
+        Maps every lowercased key and alias of a cmdset type's commands to its command class.
+        """
+        if (found := self._index.get(cmd_type, None)) is None:
+            found = dict()
+            for cmd in self.commands(cmd_type):
+                for name in (cmd.key, *cmd.aliases):
+                    found.setdefault(name.lower(), cmd)
+            self._index[cmd_type] = found
+        return found
+
+    def find(self, cmd_type: str, name: str) -> typing.Optional[type]:
+        return self.index(cmd_type).get(name.lower(), None)
+
+    def reset(self):
+        """
+        Forget everything, so the next lookup re-reads settings. Useful after a code reload.
+        """
+        self._commands.clear()
+        self._index.clear()
+
+
+COMMANDS = CommandRegistry()
+
+
+class VersionedCmdSetMixin:
+    """
+    Mixin for CmdSets which counts changes to their commands in `merge_version`, so that anything
+    derived from the commands (such as a menu's sorted command list) can tell when to rebuild.
+
+    Merged cmdsets are not cached here: Evennia's cmdhandler already caches each merged stack,
+    keyed by the cmdsets in it, and merges hold per-object command instances, so they can't be
+    shared between sessions.
+    """
+
+    merge_version = 0
+
+    def add(self, *args, **kwargs):
+        self.merge_version += 1
+        return super().add(*args, **kwargs)
+
+    def remove(self, *args, **kwargs):
+        self.merge_version += 1
+        return super().remove(*args, **kwargs)
+
+
+class _AthanorCmdSetMixin(VersionedCmdSetMixin):
+    cmd_type = None
+
+    def at_cmdset_creation(self):
+        super().at_cmdset_creation()
+        self.add(list(COMMANDS.commands(self.cmd_type)))
+        for path in getattr(settings, f"CMDSETS_{self.cmd_type}_EXTRA", list()):
+            self.add(class_from_module(path))
+
+
+class UnloggedinCmdSet(_AthanorCmdSetMixin, cmdset_unloggedin.UnloggedinCmdSet):
+    cmd_type = "UNLOGGEDIN"
+
+
+class SessionCmdSet(_AthanorCmdSetMixin, cmdset_session.SessionCmdSet):
+    cmd_type = "SESSION"
+
+
+class CharacterCmdSet(_AthanorCmdSetMixin, cmdset_character.CharacterCmdSet):
+    cmd_type = "CHARACTER"
+
+
+class AccountCmdSet(_AthanorCmdSetMixin, cmdset_account.AccountCmdSet):
+    cmd_type = "ACCOUNT"
@@ -0,0 +1,334 @@
+"""
+Reading JSON, YAML and JSON Lines data files.
+
+Parsed YAML can be cached on disk, keyed by each file's path, modification time and size, so
+unchanged files are not parsed again on every start and reload. JSON Lines files are streamed a
+record at a time instead of being loaded whole.
+
+import_directory() parses a whole directory of data files in a process pool.
+
+This module doesn't touch Django, so it can be used while settings are being composed and from
+worker processes.
+"""
+import hashlib
+import heapq
+import os
+import pickle
+import time
+import typing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
+
+import orjson
+import yaml
+
+try:
+    _YAML_LOADER = yaml.CSafeLoader
+except AttributeError:
+    _YAML_LOADER = yaml.SafeLoader
+
+FORMATS = {
+    ".json": "json",
+    ".yaml": "yaml",
+    ".yml": "yaml",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+}
+
+# only these formats are worth caching; orjson parses JSON about as fast as a pickle loads.
+CACHED_FORMATS = ("yaml",)
+
+_MISS = object()
+
+
+def data_format(p: Path) -> typing.Optional[str]:
+    """
+    "json", "yaml" or "jsonl" depending on the file's extension, or None if it isn't a data file.
+    """
+    return FORMATS.get(Path(p).suffix.lower(), None)
+
+
+def parse_json(p: Path):
+    with open(p, mode="rb") as f:
+        return orjson.loads(f.read())
+
+
+def parse_yaml(p: Path):
+    with open(p, mode="rb") as f:
+        return yaml.load(f, Loader=_YAML_LOADER)
+
+
+def iter_jsonl(p: Path) -> typing.Iterator:
+    """
+    Yields the records of a JSON Lines (NDJSON) file one at a time. Blank lines are skipped.
+
+    Raises:
+        ValueError: If a line isn't valid JSON. The message gives the file and line number.
+    """
+    with open(p, mode="rb") as f:
+        for number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield orjson.loads(line)
+            except orjson.JSONDecodeError as err:
+                raise ValueError(f"{p}:{number}: {err}") from err
+
+
+def parse_jsonl(p: Path) -> list:
+    return list(iter_jsonl(p))
+
+
+PARSERS = {
+    "json": parse_json,
+    "yaml": parse_yaml,
+    "jsonl": parse_jsonl,
+}
+
+
+class ParseCache:
+    """
+    Parsed data files, pickled into a directory. An entry is only used if the file's modification
+    time and size still match the ones it was parsed at.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.hits = 0
+        self.misses = 0
+
+    def _entry(self, p: Path) -> Path:
+        key = hashlib.sha1(os.fsencode(Path(p).resolve())).hexdigest()
+        return self.directory / f"{key}.pickle"
+
+    def get(self, p: Path, stat: os.stat_result):
+        """
+        The cached data for a file, or _MISS.
+        """
+        try:
+            with self._entry(p).open("rb") as f:
+                mtime, size, data = pickle.load(f)
+        except Exception:
+            self.misses += 1
+            return _MISS
+        if mtime != stat.st_mtime_ns or size != stat.st_size:
+            self.misses += 1
+            return _MISS
+        self.hits += 1
+        return data
+
+    def put(self, p: Path, stat: os.stat_result, data):
+        try:
+            pickled = pickle.dumps(
+                (stat.st_mtime_ns, stat.st_size, data), protocol=pickle.HIGHEST_PROTOCOL
+            )
+        except Exception:
+            return
+        entry = self._entry(p)
+        temp = entry.with_name(f"{entry.name}.{os.getpid()}.tmp")
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            temp.write_bytes(pickled)
+            temp.replace(entry)
+        except OSError:
+            temp.unlink(missing_ok=True)
+
+    def clear(self):
+        for entry in self.directory.glob("*.pickle"):
+            entry.unlink(missing_ok=True)
+
+
+_CACHES: dict[Path, ParseCache] = dict()
+
+
+def get_cache(directory) -> ParseCache:
+    directory = Path(directory)
+    if (cache := _CACHES.get(directory, None)) is None:
+        cache = _CACHES[directory] = ParseCache(directory)
+    return cache
+
+
+def cached(p: Path, cache_dir, fmt: typing.Optional[str] = None):
+    """
+    The cached parse of a data file, or _MISS if it isn't cached or has changed since.
+    """
+    if cache_dir is None or (fmt or data_format(p)) not in CACHED_FORMATS:
+        return _MISS
+    return get_cache(cache_dir).get(p, os.stat(p))
+
+
+def load(p: Path, cache_dir=None, fmt: typing.Optional[str] = None):
+    """
+    Parse a data file.
+
+    Args:
+        p (Path): The file. Its format is picked by extension (see FORMATS).
+        cache_dir (Path, optional): If given, YAML files are cached in this directory.
+        fmt (str, optional): Parse as this format ("json", "yaml" or "jsonl") whatever the
+            extension.
+
+    Returns:
+        The parsed data, or None if the file isn't a known data format.
+    """
+    if fmt is None and (fmt := data_format(p)) is None:
+        return None
+    parser = PARSERS[fmt]
+    if cache_dir is None or fmt not in CACHED_FORMATS:
+        return parser(p)
+    cache = get_cache(cache_dir)
+    stat = os.stat(p)
+    if (data := cache.get(p, stat)) is not _MISS:
+        return data
+    data = parser(p)
+    cache.put(p, stat, data)
+    return data
+
+
+class DataFileResult(typing.NamedTuple):
+    path: Path
+    data: typing.Any
+    # time spent reading and parsing the file (or loading it from the cache).
+    seconds: float
+    error: typing.Optional[str] = None
+
+
+class ImportReport:
+    """
+    Totals for one import_directory() run, filled in as its results are consumed.
+    """
+
+    def __init__(self):
+        self.files = 0
+        self.errors = 0
+        self.cached = 0
+        # time spent parsing, summed over every file (more than elapsed with several workers).
+        self.parse_seconds = 0.0
+        # wall time from the start of the import until the last result was yielded.
+        self.elapsed = 0.0
+        self.results: list[DataFileResult] = list()
+
+    def add(self, result: DataFileResult, cached: bool = False):
+        self.files += 1
+        self.parse_seconds += result.seconds
+        if cached:
+            self.cached += 1
+        if result.error is not None:
+            self.errors += 1
+        # the data isn't kept; the consumer has it.
+        self.results.append(result._replace(data=None))
+
+    def slowest(self, count: int = 10) -> list[DataFileResult]:
+        return heapq.nlargest(count, self.results, key=lambda r: r.seconds)
+
+    def summary(self, count: int = 5) -> str:
+        lines = [
+            f"Imported {self.files} data files ({self.cached} cached, {self.errors} failed) in "
+            f"{self.elapsed:.2f}s, {self.parse_seconds:.2f}s spent parsing."
+        ]
+        for result in self.slowest(count):
+            lines.append(f"  {result.seconds:.3f}s {result.path}")
+        return "\n".join(lines)
+
+
+def find_data_files(directory, recursive: bool = True) -> list[Path]:
+    """
+    Every data file in a directory, sorted by path.
+    """
+    directory = Path(directory)
+    found = directory.rglob("*") if recursive else directory.iterdir()
+    return sorted(p for p in found if data_format(p) and p.is_file())
+
+
+def _load_timed(p: Path, cache_dir) -> tuple[typing.Any, float, typing.Optional[str]]:
+    start = time.perf_counter()
+    try:
+        data = load(p, cache_dir=cache_dir)
+    except Exception as err:
+        return None, time.perf_counter() - start, f"{type(err).__name__}: {err}"
+    return data, time.perf_counter() - start, None
+
+
+def _validate_names(data, validate: typing.Callable, name_key: str):
+    records = data if isinstance(data, list) else [data]
+    for record in records:
+        if isinstance(record, dict) and isinstance(name := record.get(name_key, None), str):
+            record[name_key] = validate(name)
+
+
+def import_directory(
+    directory,
+    workers: typing.Optional[int] = None,
+    cache_dir=None,
+    validate: typing.Optional[typing.Callable[[str], str]] = None,
+    name_key: str = "name",
+    recursive: bool = True,
+    mp_context=None,
+    report: typing.Optional[ImportReport] = None,
+) -> typing.Iterator[DataFileResult]:
+    """
+    Parse every data file in a directory, in parallel, and yield the results in path order.
+
+    Files which are cached (see cache_dir) are loaded directly; the rest are parsed by a pool of
+    worker processes. A file which fails to parse or validate is still yielded, with data set to
+    None and error saying why, so one bad file doesn't stop the import.
+
+    Args:
+        directory (Path): Where to look. Subdirectories are searched too unless recursive is False.
+        workers (int, optional): Worker processes. Defaults to the number of CPUs. With 1 or fewer,
+            or a single file to parse, everything is parsed in this process.
+        cache_dir (Path, optional): The YAML parse cache directory; see load().
+        validate (callable, optional): Called on the name_key value of every dict record (a file
+            holds either one record or a list of them). It returns the cleaned name, which
+            replaces the original, and raises ValueError if the name is invalid.
+        name_key (str): The record key holding names.
+        mp_context (multiprocessing context, optional): Passed to ProcessPoolExecutor. In a
+            process which runs threads, such as the server, use "forkserver" or "spawn".
+        report (ImportReport, optional): Filled in with totals and per-file timings, for
+            spotting slow files. It is complete once every result has been consumed.
+
+    Yields:
+        DataFileResult
+    """
+    started = time.perf_counter()
+    if not (paths := find_data_files(directory, recursive=recursive)):
+        return
+
+    hits = dict()
+    for p in paths:
+        start = time.perf_counter()
+        if (data := cached(p, cache_dir)) is not _MISS:
+            hits[p] = (data, time.perf_counter() - start, None)
+    misses = [p for p in paths if p not in hits]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(misses))
+    pool = None
+    if workers > 1:
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=mp_context)
+        parsed = pool.map(
+            _load_timed,
+            misses,
+            repeat(cache_dir),
+            chunksize=max(1, len(misses) // (workers * 4)),
+        )
+    else:
+        parsed = map(_load_timed, misses, repeat(cache_dir))
+
+    try:
+        for p in paths:
+            data, seconds, error = hits[p] if p in hits else next(parsed)
+            if error is None and validate is not None:
+                try:
+                    _validate_names(data, validate, name_key)
+                except ValueError as err:
+                    data, error = None, f"ValueError: {err}"
+            result = DataFileResult(p, data, seconds, error)
+            if report is not None:
+                report.add(result, cached=p in hits)
+                report.elapsed = time.perf_counter() - started
+            yield result
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,538 @@
+"""
+Athanor's event bus.
+
+Handlers are kept per event, and every registration change rebuilds that event's dispatch table:
+a tuple of handlers already sorted by priority, plus a dict of tuples for handlers which only want
+events from one sender. Emitting is a dict lookup and a loop over a tuple. An event nobody listens
+to costs a single failed dict lookup.
+
+Handlers may also ask to be called later instead of inside emit(): at the end of the current
+reactor tick ("deferred"), or on a worker thread ("thread"). This keeps slow handlers, such as
+ones that log to the database, from adding to the cost of the code that emitted the event.
+
+This module must not touch Django, as athanor/__init__.py imports it while settings are composed.
+"""
+import functools
+import queue
+import threading
+import time
+import typing
+import weakref
+
+_ANY = object()
+_REFS = (weakref.ref, weakref.WeakMethod)
+
+SYNC = "sync"
+DEFERRED = "deferred"
+THREAD = "thread"
+MODES = (SYNC, DEFERRED, THREAD)
+
+
+class EventStats:
+    """
+    Counters for one event. Only emits that reached at least one handler are counted.
+    """
+
+    __slots__ = ("emitted", "calls", "errors", "total_time")
+
+    def __init__(self):
+        self.emitted = 0
+        self.calls = 0
+        self.errors = 0
+        self.total_time = 0.0
+
+    @property
+    def average_time(self) -> float:
+        return self.total_time / self.emitted if self.emitted else 0.0
+
+    def __repr__(self):
+        return (
+            f"<EventStats emitted={self.emitted} calls={self.calls} errors={self.errors} "
+            f"avg={self.average_time * 1000:.3f}ms>"
+        )
+
+
+class _Subscription:
+    __slots__ = ("handler", "priority", "sender", "uid", "order", "mode", "weak")
+
+    def __init__(self, handler, priority, sender, uid, order, mode, weak=False):
+        # a weakref.ref or WeakMethod to the handler if weak.
+        self.handler = handler
+        self.priority = priority
+        self.sender = sender
+        self.uid = uid
+        self.order = order
+        self.mode = mode
+        self.weak = weak
+
+
+def _make_uid(handler) -> typing.Hashable:
+    # by identity, like Django, so the uid itself doesn't keep a weak handler alive.
+    if hasattr(handler, "__func__"):
+        return id(handler.__self__), id(handler.__func__)
+    return id(handler)
+
+
+def _live(ref):
+    """
+    Wraps a weak reference to a handler in a callable which does nothing once it is dead.
+    """
+
+    def call(*args, **kwargs):
+        if (handler := ref()) is not None:
+            return handler(*args, **kwargs)
+
+    return call
+
+
+def _log_handler_error(event: str):
+    from evennia.utils import logger
+
+    logger.log_trace(f"Error in handler for event '{event}'.")
+
+
+class DeferredDispatcher:
+    """
+    Collects "deferred" handler calls and runs them all in one reactor callback, after the code
+    that emitted them has returned.
+    """
+
+    def __init__(self, bus: "EventBus"):
+        self.bus = bus
+        self._pending: list[tuple] = list()
+        self._scheduled = False
+        self.batches = 0
+        self.largest_batch = 0
+
+    def submit(self, event: str, handler, *args, **kwargs):
+        self._pending.append((event, handler, args, kwargs))
+        if self._scheduled:
+            return
+        self._scheduled = True
+        try:
+            from twisted.internet import reactor
+        except ImportError:
+            self.flush()
+            return
+        reactor.callLater(0, self.flush)
+
+    def flush(self):
+        """
+        Run every pending call now.
+        """
+        self._scheduled = False
+        pending, self._pending = self._pending, list()
+        if not pending:
+            return
+        self.batches += 1
+        self.largest_batch = max(self.largest_batch, len(pending))
+        for event, handler, args, kwargs in pending:
+            try:
+                handler(*args, **kwargs)
+            except Exception:
+                self.bus.stats_for(event).errors += 1
+                _log_handler_error(event)
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+
+class ThreadDispatcher:
+    """
+    Runs "thread" handler calls on a fixed set of worker threads fed by a bounded queue.
+
+    When the queue is full, a call is dropped rather than blocking the emitter. The drop is counted
+    in `dropped`, and `high_water` records the deepest the queue has been. If those numbers grow,
+    add workers or make the handlers cheaper.
+    """
+
+    def __init__(self, bus: "EventBus", workers: int = 2, max_queue: int = 10000):
+        self.bus = bus
+        self.workers = workers
+        self.max_queue = max_queue
+        self._queue: typing.Optional[queue.Queue] = None
+        self._threads: list[threading.Thread] = list()
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.dropped = 0
+        self.high_water = 0
+
+    def configure(self, workers: typing.Optional[int] = None, max_queue: typing.Optional[int] = None):
+        """
+        Change the pool size. Only has an effect before the first threaded handler runs.
+        """
+        if workers is not None:
+            self.workers = workers
+        if max_queue is not None:
+            self.max_queue = max_queue
+
+    def _start(self):
+        with self._lock:
+            if self._queue is not None:
+                return
+            self._queue = queue.Queue(maxsize=self.max_queue)
+            for i in range(self.workers):
+                thread = threading.Thread(
+                    target=self._work, name=f"athanor-events-{i}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, event: str, handler, *args, **kwargs):
+        if self._queue is None:
+            self._start()
+        try:
+            self._queue.put_nowait((event, handler, args, kwargs))
+        except queue.Full:
+            self.dropped += 1
+            return
+        self.submitted += 1
+        if (depth := self._queue.qsize()) > self.high_water:
+            self.high_water = depth
+
+    def _work(self):
+        while True:
+            event, handler, args, kwargs = self._queue.get()
+            try:
+                handler(*args, **kwargs)
+            except Exception:
+                self.bus.stats_for(event).errors += 1
+                _log_handler_error(event)
+            finally:
+                self.completed += 1
+                self._queue.task_done()
+                if self._queue.empty():
+                    self._release_connections()
+
+    @staticmethod
+    def _release_connections():
+        try:
+            from django.db import close_old_connections
+        except ImportError:
+            return
+        close_old_connections()
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def flush(self):
+        """
+        Block until every queued call has run.
+        """
+        if self._queue is not None:
+            self._queue.join()
+
+
+class EventBus:
+    """
+    Maps event names to handlers.
+
+    Handlers with a higher priority run first; equal priorities run in registration order. A
+    handler registered with a sender only runs when emit() is called with that same sender keyword.
+    """
+
+    def __init__(self):
+        self._subscriptions: dict[str, list[_Subscription]] = dict()
+        # event -> (handlers for any sender, {sender: handlers for that sender})
+        self._dispatch: dict[str, tuple[tuple, dict]] = dict()
+        self.stats: dict[str, EventStats] = dict()
+        self._lock = threading.RLock()
+        self._counter = 0
+        # set when a weakly held handler is garbage collected; see _purge().
+        self._dead = False
+        self.deferred = DeferredDispatcher(self)
+        self.threaded = ThreadDispatcher(self)
+
+    def stats_for(self, event: str) -> EventStats:
+        if (stats := self.stats.get(event, None)) is None:
+            stats = self.stats[event] = EventStats()
+        return stats
+
+    def _caller(self, event: str, s: _Subscription):
+        handler = _live(s.handler) if s.weak else s.handler
+        if s.mode == DEFERRED:
+            return functools.partial(self.deferred.submit, event, handler)
+        if s.mode == THREAD:
+            return functools.partial(self.threaded.submit, event, handler)
+        return handler
+
+    def _flag_dead(self, _ref=None):
+        self._dead = True
+
+    def _purge(self):
+        """
+        Drop the subscriptions of weakly held handlers which have been garbage collected.
+        """
+        with self._lock:
+            self._dead = False
+            for event, subscriptions in list(self._subscriptions.items()):
+                kept = [s for s in subscriptions if not (s.weak and s.handler() is None)]
+                if len(kept) != len(subscriptions):
+                    self._subscriptions[event] = kept
+                    self._compile(event)
+
+    def _compile(self, event: str):
+        if not (subscriptions := self._subscriptions.get(event, None)):
+            self._subscriptions.pop(event, None)
+            self._dispatch.pop(event, None)
+            return
+        ordered = [
+            (s, (s.handler, self._caller(event, s)))
+            for s in sorted(subscriptions, key=lambda s: (-s.priority, s.order))
+        ]
+        general = tuple(entry for s, entry in ordered if s.sender is _ANY)
+        by_sender = dict()
+        for sender in {s.sender for s, _entry in ordered if s.sender is not _ANY}:
+            by_sender[sender] = tuple(
+                entry for s, entry in ordered if s.sender is _ANY or s.sender == sender
+            )
+        self._dispatch[event] = (general, by_sender)
+
+    def register(
+        self,
+        event: str,
+        handler: typing.Callable,
+        priority: int = 0,
+        sender=_ANY,
+        dispatch_uid: typing.Optional[typing.Hashable] = None,
+        mode: str = SYNC,
+        weak: bool = False,
+    ):
+        """
+        Subscribe handler to event. Registering the same handler (or dispatch_uid) for the same
+        sender again only updates its priority and mode.
+
+        Args:
+            mode (str): When the handler runs. "sync" runs it inside emit(). "deferred" queues it
+                to run at the end of the current reactor tick, batched with other deferred calls.
+                "thread" queues it for the worker pool. Non-sync handlers' return values and
+                exceptions never reach the emitter.
+            weak (bool): Only hold a weak reference to handler, as Django signals do by default.
+                The subscription goes away when the handler is garbage collected.
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown event delivery mode: {mode}")
+        uid = dispatch_uid if dispatch_uid is not None else _make_uid(handler)
+        if weak:
+            ref_type = weakref.WeakMethod if hasattr(handler, "__func__") else weakref.ref
+            handler = ref_type(handler, self._flag_dead)
+        with self._lock:
+            if self._dead:
+                self._purge()
+            subscriptions = self._subscriptions.setdefault(event, list())
+            for s in subscriptions:
+                if s.uid == uid and s.sender == sender:
+                    s.priority = priority
+                    s.mode = mode
+                    break
+            else:
+                self._counter += 1
+                subscriptions.append(
+                    _Subscription(handler, priority, sender, uid, self._counter, mode, weak)
+                )
+            self._compile(event)
+
+    def unregister(
+        self,
+        event: str,
+        handler: typing.Optional[typing.Callable] = None,
+        sender=_ANY,
+        dispatch_uid: typing.Optional[typing.Hashable] = None,
+    ) -> bool:
+        """
+        Remove a subscription made by register(). Returns whether one was removed.
+        """
+        uid = dispatch_uid if dispatch_uid is not None else _make_uid(handler)
+        with self._lock:
+            subscriptions = self._subscriptions.get(event, list())
+            kept = [s for s in subscriptions if not (s.uid == uid and s.sender == sender)]
+            if len(kept) == len(subscriptions):
+                return False
+            self._subscriptions[event] = kept
+            self._compile(event)
+            return True
+
+    def clear(self, event: typing.Optional[str] = None):
+        with self._lock:
+            for name in [event] if event else list(self._subscriptions):
+                self._subscriptions.pop(name, None)
+                self._compile(name)
+
+    def _entries(self, event: str, sender=_ANY) -> tuple:
+        if (compiled := self._dispatch.get(event, None)) is None:
+            return tuple()
+        general, by_sender = compiled
+        if sender is _ANY or not by_sender:
+            return general
+        try:
+            return by_sender.get(sender, general)
+        except TypeError:
+            return general
+
+    def handlers(self, event: str, sender=_ANY) -> tuple:
+        """
+        The handlers emit() would call, in order.
+        """
+        if self._dead:
+            self._purge()
+        return tuple(
+            handler() if type(handler) in _REFS else handler
+            for handler, _call in self._entries(event, sender)
+        )
+
+    def has_handlers(self, event: str, sender=_ANY) -> bool:
+        if self._dead:
+            self._purge()
+        return bool(self._entries(event, sender))
+
+    def emit(self, event: str, *args, **kwargs) -> list:
+        """
+        Call every handler of event with *args and **kwargs. A `sender` keyword also selects the
+        handlers registered for that sender. Exceptions propagate to the caller.
+
+        Returns:
+            list of (handler, result)
+        """
+        if self._dead:
+            self._purge()
+        if (compiled := self._dispatch.get(event, None)) is None:
+            return []
+        general, by_sender = compiled
+        handlers = general
+        if by_sender and (sender := kwargs.get("sender", _ANY)) is not _ANY:
+            try:
+                handlers = by_sender.get(sender, general)
+            except TypeError:
+                # unhashable senders can't have handlers of their own.
+                pass
+        if not handlers:
+            return []
+        return self._call(event, handlers, args, kwargs, robust=False)
+
+    def emit_robust(self, event: str, *args, **kwargs) -> list:
+        """
+        Like emit(), but an exception from a handler is logged and returned in place of its result
+        instead of stopping the others.
+        """
+        if self._dead:
+            self._purge()
+        handlers = self._entries(event, kwargs.get("sender", _ANY))
+        if not handlers:
+            return []
+        return self._call(event, handlers, args, kwargs, robust=True)
+
+    def _call(self, event, handlers, args, kwargs, robust: bool) -> list:
+        stats = self.stats_for(event)
+        stats.emitted += 1
+        results = list()
+        start = time.perf_counter()
+        try:
+            for handler, call in handlers:
+                if type(handler) in _REFS and (handler := handler()) is None:
+                    continue
+                stats.calls += 1
+                try:
+                    results.append((handler, call(*args, **kwargs)))
+                except Exception as err:
+                    stats.errors += 1
+                    if not robust:
+                        raise
+                    _log_handler_error(event)
+                    results.append((handler, err))
+        finally:
+            stats.total_time += time.perf_counter() - start
+        return results
+
+    def report(self) -> str:
+        """
+        A plain-text table of event counters, most expensive first.
+        """
+        lines = [f"{'Event':<40} {'Emitted':>9} {'Calls':>9} {'Errors':>7} {'Avg':>10}"]
+        for name, stats in sorted(
+            self.stats.items(), key=lambda i: i[1].total_time, reverse=True
+        ):
+            lines.append(
+                f"{name:<40} {stats.emitted:>9} {stats.calls:>9} {stats.errors:>7} "
+                f"{stats.average_time * 1000:>8.3f}ms"
+            )
+        lines.append("")
+        lines.append(
+            f"Deferred: {self.deferred.batches} batches, largest {self.deferred.largest_batch}, "
+            f"{self.deferred.pending} pending"
+        )
+        threaded = self.threaded
+        lines.append(
+            f"Threaded: {threaded.submitted} queued, {threaded.completed} done, "
+            f"{threaded.dropped} dropped, depth {threaded.depth}/{threaded.max_queue} "
+            f"(peak {threaded.high_water}), {threaded.workers} workers"
+        )
+        return "\n".join(lines)
+
+
+class EventSignal:
+    """
+    A Django Signal lookalike for one event, so code written against the old
+    `athanor.EVENTS[name]` signals keeps working.
+
+    As with Django, receivers are held by weak reference unless connected with weak=False, and
+    receivers get a `signal` keyword.
+    """
+
+    __slots__ = ("bus", "name")
+
+    def __init__(self, bus: EventBus, name: str):
+        self.bus = bus
+        self.name = name
+
+    def connect(self, receiver, sender=None, weak=True, dispatch_uid=None):
+        self.bus.register(
+            self.name,
+            receiver,
+            sender=_ANY if sender is None else sender,
+            dispatch_uid=dispatch_uid,
+            weak=weak,
+        )
+
+    def disconnect(self, receiver=None, sender=None, dispatch_uid=None) -> bool:
+        return self.bus.unregister(
+            self.name,
+            receiver,
+            sender=_ANY if sender is None else sender,
+            dispatch_uid=dispatch_uid,
+        )
+
+    def has_listeners(self, sender=None) -> bool:
+        return self.bus.has_handlers(self.name, _ANY if sender is None else sender)
+
+    def send(self, sender, **named) -> list:
+        return self.bus.emit(self.name, signal=self, sender=sender, **named)
+
+    def send_robust(self, sender, **named) -> list:
+        return self.bus.emit_robust(self.name, signal=self, sender=sender, **named)
+
+
+class EventSignals:
+    """
+    The `athanor.EVENTS` mapping. Looking an event up doesn't register anything.
+    """
+
+    def __init__(self, bus: EventBus):
+        self.bus = bus
+        self._signals: dict[str, EventSignal] = dict()
+
+    def __getitem__(self, name: str) -> EventSignal:
+        if (signal := self._signals.get(name, None)) is None:
+            signal = self._signals[name] = EventSignal(self.bus, name)
+        return signal
+
+    def __contains__(self, name: str) -> bool:
+        return self.bus.has_handlers(name)
+
+    def keys(self):
+        return self.bus._subscriptions.keys()
+
+
+BUS = EventBus()
@@ -0,0 +1,176 @@
+import typing
+from collections import defaultdict
+
+# Rooms are bucketed into cubic cells of this size so that box queries only touch the cells
+# overlapping the box rather than every room in the zone.
+CELL_SIZE = 16
+
+Coordinates = tuple[str, int, int, int]
+
+
+def _cell(zone: str, x: int, y: int, z: int) -> tuple:
+    return zone, x // CELL_SIZE, y // CELL_SIZE, z // CELL_SIZE
+
+
+def resolve_objects(ids: typing.Iterable[int]) -> dict[int, "DefaultObject"]:
+    """
+    Turns ObjectDB ids into typeclassed objects, preferring the idmapper cache and fetching any misses
+    with a single query.
+    """
+    from evennia.objects.models import ObjectDB
+
+    found = dict()
+    missing = list()
+    for obj_id in ids:
+        if (obj := ObjectDB.get_cached_instance(obj_id)) is not None:
+            found[obj_id] = obj
+        else:
+            missing.append(obj_id)
+    if missing:
+        found.update({obj.id: obj for obj in ObjectDB.objects.filter(id__in=missing)})
+    return found
+
+
+class CoordinateIndex:
+    """
+    In-memory spatial hash of room coordinates, keyed by (zone, x, y, z).
+
+    The RoomCoordinates table is the source of truth. It is loaded in one query the first time the
+    index is used, and every change made through this index is written through to it.
+    """
+
+    def __init__(self):
+        self._rooms: typing.Optional[dict[int, Coordinates]] = None
+        self._cells: dict[tuple, dict[Coordinates, int]] = defaultdict(dict)
+
+    def load(self):
+        from athanor.grid.models import RoomCoordinates
+
+        self._rooms = dict()
+        self._cells.clear()
+        for room_id, zone, x, y, z in RoomCoordinates.objects.values_list(
+            "id", "zone", "x", "y", "z"
+        ):
+            self._index(room_id, (zone, x, y, z))
+
+    def _ensure(self):
+        if self._rooms is None:
+            self.load()
+
+    def _index(self, room_id: int, coords: Coordinates):
+        self._rooms[room_id] = coords
+        self._cells[_cell(*coords)][coords] = room_id
+
+    def _unindex(self, room_id: int) -> typing.Optional[Coordinates]:
+        if not (coords := self._rooms.pop(room_id, None)):
+            return None
+        cell_key = _cell(*coords)
+        if (cell := self._cells.get(cell_key)) is not None:
+            if cell.get(coords) == room_id:
+                del cell[coords]
+            if not cell:
+                del self._cells[cell_key]
+        return coords
+
+    def get(self, room) -> typing.Optional[Coordinates]:
+        """
+        Returns (zone, x, y, z) for a room, or None if it has no coordinates.
+        """
+        self._ensure()
+        return self._rooms.get(room.id, None)
+
+    def set(self, room, x: int, y: int, z: int = 0, zone: str = ""):
+        from athanor.grid.models import RoomCoordinates
+
+        self._ensure()
+        RoomCoordinates.objects.update_or_create(
+            id=room, defaults={"zone": zone, "x": x, "y": y, "z": z}
+        )
+        self._unindex(room.id)
+        self._index(room.id, (zone, x, y, z))
+
+    def remove(self, room, save: bool = True):
+        from athanor.grid.models import RoomCoordinates
+
+        self._ensure()
+        self._unindex(room.id)
+        if save:
+            RoomCoordinates.objects.filter(id=room.id).delete()
+
+    def at(self, zone: str, x: int, y: int, z: int = 0):
+        """
+        Returns the room at the given coordinates, or None.
+        """
+        self._ensure()
+        coords = (zone, x, y, z)
+        if (room_id := self._cells.get(_cell(*coords), dict()).get(coords)) is None:
+            return None
+        return resolve_objects([room_id]).get(room_id, None)
+
+    def box_ids(
+        self,
+        zone: str,
+        min_x: int,
+        max_x: int,
+        min_y: int,
+        max_y: int,
+        min_z: int = 0,
+        max_z: int = 0,
+    ) -> dict[tuple[int, int, int], int]:
+        """
+        Finds every room inside an inclusive box. Only the cells overlapping the box are visited.
+
+        Returns:
+            dict of (x, y, z) -> room id
+        """
+        self._ensure()
+        out = dict()
+        cells = self._cells
+        for cx in range(min_x // CELL_SIZE, max_x // CELL_SIZE + 1):
+            for cy in range(min_y // CELL_SIZE, max_y // CELL_SIZE + 1):
+                for cz in range(min_z // CELL_SIZE, max_z // CELL_SIZE + 1):
+                    if not (cell := cells.get((zone, cx, cy, cz))):
+                        continue
+                    for (_zone, x, y, z), room_id in cell.items():
+                        if (
+                            min_x <= x <= max_x
+                            and min_y <= y <= max_y
+                            and min_z <= z <= max_z
+                        ):
+                            out[(x, y, z)] = room_id
+        return out
+
+    def box(self, zone: str, min_x, max_x, min_y, max_y, min_z=0, max_z=0):
+        """
+        Like box_ids(), but returns dict of (x, y, z) -> room.
+        """
+        found = self.box_ids(zone, min_x, max_x, min_y, max_y, min_z, max_z)
+        rooms = resolve_objects(found.values())
+        return {
+            coords: rooms[room_id]
+            for coords, room_id in found.items()
+            if room_id in rooms
+        }
+
+    def radius(self, zone: str, x: int, y: int, z: int, radius: int):
+        """
+        Returns dict of (x, y, z) -> room for every room within radius (Euclidean) of a point.
+        """
+        limit = radius * radius
+        found = {
+            coords: room_id
+            for coords, room_id in self.box_ids(
+                zone, x - radius, x + radius, y - radius, y + radius, z - radius, z + radius
+            ).items()
+            if (coords[0] - x) ** 2 + (coords[1] - y) ** 2 + (coords[2] - z) ** 2
+            <= limit
+        }
+        rooms = resolve_objects(found.values())
+        return {
+            coords: rooms[room_id]
+            for coords, room_id in found.items()
+            if room_id in rooms
+        }
+
+
+COORDINATES = CoordinateIndex()
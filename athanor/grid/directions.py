@@ -0,0 +1,181 @@
+import enum
+import typing
+
+
+class ExitDir(enum.Enum):
+    """
+    The directions an Exit can face. The value is the canonical exit key.
+    """
+
+    NORTH = "north"
+    NORTHEAST = "northeast"
+    EAST = "east"
+    SOUTHEAST = "southeast"
+    SOUTH = "south"
+    SOUTHWEST = "southwest"
+    WEST = "west"
+    NORTHWEST = "northwest"
+    UP = "up"
+    DOWN = "down"
+    INSIDE = "inside"
+    OUTSIDE = "outside"
+
+    @property
+    def abbreviation(self) -> str:
+        return _ABBREVIATIONS[self]
+
+    @property
+    def offset(self) -> tuple[int, int, int]:
+        """
+        The (x, y, z) step taken by moving in this direction. INSIDE and OUTSIDE don't move on the grid.
+        """
+        return _OFFSETS[self]
+
+    @property
+    def reverse(self) -> "ExitDir":
+        return _REVERSE[self]
+
+    @classmethod
+    def from_string(cls, text) -> typing.Optional["ExitDir"]:
+        """
+        Resolves a direction from its full name or abbreviation, case-insensitively.
+
+        Returns:
+            ExitDir or None
+        """
+        if isinstance(text, cls):
+            return text
+        if not isinstance(text, str):
+            return None
+        return _LOOKUP.get(text.strip().lower(), None)
+
+
+_ABBREVIATIONS = {
+    ExitDir.NORTH: "n",
+    ExitDir.NORTHEAST: "ne",
+    ExitDir.EAST: "e",
+    ExitDir.SOUTHEAST: "se",
+    ExitDir.SOUTH: "s",
+    ExitDir.SOUTHWEST: "sw",
+    ExitDir.WEST: "w",
+    ExitDir.NORTHWEST: "nw",
+    ExitDir.UP: "u",
+    ExitDir.DOWN: "d",
+    ExitDir.INSIDE: "in",
+    ExitDir.OUTSIDE: "out",
+}
+
+_OFFSETS = {
+    ExitDir.NORTH: (0, 1, 0),
+    ExitDir.NORTHEAST: (1, 1, 0),
+    ExitDir.EAST: (1, 0, 0),
+    ExitDir.SOUTHEAST: (1, -1, 0),
+    ExitDir.SOUTH: (0, -1, 0),
+    ExitDir.SOUTHWEST: (-1, -1, 0),
+    ExitDir.WEST: (-1, 0, 0),
+    ExitDir.NORTHWEST: (-1, 1, 0),
+    ExitDir.UP: (0, 0, 1),
+    ExitDir.DOWN: (0, 0, -1),
+    ExitDir.INSIDE: (0, 0, 0),
+    ExitDir.OUTSIDE: (0, 0, 0),
+}
+
+_REVERSE = {
+    ExitDir.NORTH: ExitDir.SOUTH,
+    ExitDir.NORTHEAST: ExitDir.SOUTHWEST,
+    ExitDir.EAST: ExitDir.WEST,
+    ExitDir.SOUTHEAST: ExitDir.NORTHWEST,
+    ExitDir.SOUTH: ExitDir.NORTH,
+    ExitDir.SOUTHWEST: ExitDir.NORTHEAST,
+    ExitDir.WEST: ExitDir.EAST,
+    ExitDir.NORTHWEST: ExitDir.SOUTHEAST,
+    ExitDir.UP: ExitDir.DOWN,
+    ExitDir.DOWN: ExitDir.UP,
+    ExitDir.INSIDE: ExitDir.OUTSIDE,
+    ExitDir.OUTSIDE: ExitDir.INSIDE,
+}
+
+_LOOKUP = {d.value: d for d in ExitDir}
+_LOOKUP.update({abbr: d for d, abbr in _ABBREVIATIONS.items()})
+
+
+def exit_direction(obj) -> typing.Optional[ExitDir]:
+    """
+    Determines which way an exit faces. An explicit `direction` Attribute wins, otherwise the exit's
+    key is used.
+    """
+    if direction := ExitDir.from_string(obj.attributes.get("direction", default=None)):
+        return direction
+    return ExitDir.from_string(obj.key)
+
+
+class ExitIndex:
+    """
+    A non-persistent map of ExitDir -> Exit for a single room.
+
+    It is built lazily from the room's contents the first time it's needed after the room is loaded
+    into memory, and is kept up to date by the room's at_object_receive/at_object_leave hooks.
+    """
+
+    def __init__(self, room):
+        self.room = room
+        self._exits: typing.Optional[dict[ExitDir, "DefaultExit"]] = None
+
+    @property
+    def exits(self) -> dict[ExitDir, "DefaultExit"]:
+        if self._exits is None:
+            self.rebuild()
+        return self._exits
+
+    def rebuild(self):
+        self._exits = dict()
+        for obj in self.room.contents:
+            self._add(obj)
+
+    def invalidate(self):
+        self._exits = None
+
+    def _add(self, obj):
+        if "exit" not in getattr(obj, "_content_types", ()):
+            return
+        if direction := exit_direction(obj):
+            self._exits[direction] = obj
+
+    def add(self, obj):
+        if self._exits is None:
+            # not built yet. The next access will pick it up from contents.
+            return
+        self.remove(obj)
+        self._add(obj)
+
+    def remove(self, obj):
+        if not self._exits:
+            return
+        for direction in [d for d, ex in self._exits.items() if ex == obj]:
+            del self._exits[direction]
+
+    def get(self, direction) -> typing.Optional["DefaultExit"]:
+        """
+        Retrieve the exit facing direction, which may be an ExitDir or a string.
+        """
+        if not (direction := ExitDir.from_string(direction)):
+            return None
+        if not (ex := self.exits.get(direction, None)):
+            return None
+        if ex.location != self.room:
+            # the exit got away from us without a hook firing.
+            del self._exits[direction]
+            return None
+        return ex
+
+    def items(self):
+        return self.exits.items()
+
+    def __contains__(self, direction):
+        return self.get(direction) is not None
+
+    def __iter__(self):
+        return iter(self.exits)
+
+    def __len__(self):
+        return len(self.exits)
@@ -0,0 +1,22 @@
+from django.db import models
+
+
+class RoomCoordinates(models.Model):
+    id = models.OneToOneField(
+        "objects.ObjectDB",
+        primary_key=True,
+        related_name="room_coordinates",
+        on_delete=models.CASCADE,
+    )
+    zone = models.CharField(max_length=255, blank=True, default="")
+    x = models.IntegerField(default=0)
+    y = models.IntegerField(default=0)
+    z = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["zone", "x", "y", "z"], name="athanor_room_zxyz_idx"),
+        ]
+
+    def __str__(self):
+        return str(self.id)
@@ -0,0 +1,296 @@
+import heapq
+import typing
+from collections import OrderedDict, defaultdict, deque
+
+from athanor.grid.coordinates import COORDINATES, resolve_objects
+
+
+def _id(obj) -> int:
+    return obj if isinstance(obj, int) else obj.id
+
+
+def traverse_predicate(traverser) -> typing.Callable:
+    """
+    The default traversal check: can traverser pass the exit's traverse lock?
+    """
+
+    def check(exit_obj) -> bool:
+        return exit_obj.access(traverser, "traverse")
+
+    return check
+
+
+def grid_heuristic(room_id: int, goal_id: int) -> int:
+    """
+    An A* heuristic using room coordinates. It is only admissible if every exit connects rooms that are
+    at most one grid step apart, so only use it on grids built that way.
+    """
+    rooms = COORDINATES._rooms or dict()
+    if not (start := rooms.get(room_id)) or not (goal := rooms.get(goal_id)):
+        return 0
+    if start[0] != goal[0]:
+        return 0
+    return max(abs(start[1] - goal[1]), abs(start[2] - goal[2]), abs(start[3] - goal[3]))
+
+
+class ExitGraph:
+    """
+    An in-memory adjacency map of every exit in the game (room id -> {exit id: destination id}).
+
+    It is loaded with a single query on first use and kept current from Django's post_save and
+    post_delete signals, so it follows exits as they are created, deleted, moved or re-pointed. Recent
+    routes are kept in a small LRU that is emptied whenever the graph changes.
+    """
+
+    def __init__(self, cache_size: int = 128):
+        self.cache_size = cache_size
+        self._edges: typing.Optional[dict[int, dict[int, int]]] = None
+        self._exits: dict[int, tuple[int, int]] = dict()
+        self._routes: OrderedDict = OrderedDict()
+
+    def load(self):
+        from evennia.objects.models import ObjectDB
+
+        self._edges = defaultdict(dict)
+        self._exits = dict()
+        self._routes.clear()
+        for exit_id, location_id, destination_id in ObjectDB.objects.filter(
+            db_location__isnull=False, db_destination__isnull=False
+        ).values_list("id", "db_location_id", "db_destination_id"):
+            self._link(exit_id, location_id, destination_id)
+        self._connect_signals()
+
+    def _ensure(self):
+        if self._edges is None:
+            self.load()
+
+    def _connect_signals(self):
+        from django.db.models.signals import post_save, post_delete
+
+        post_save.connect(
+            _at_object_saved, weak=False, dispatch_uid="athanor_exit_graph_save"
+        )
+        post_delete.connect(
+            _at_object_deleted, weak=False, dispatch_uid="athanor_exit_graph_delete"
+        )
+
+    def _link(self, exit_id: int, location_id: int, destination_id: int):
+        self._exits[exit_id] = (location_id, destination_id)
+        self._edges[location_id][exit_id] = destination_id
+
+    def _unlink(self, exit_id: int):
+        if not (old := self._exits.pop(exit_id, None)):
+            return
+        if (edges := self._edges.get(old[0])) is not None:
+            edges.pop(exit_id, None)
+            if not edges:
+                del self._edges[old[0]]
+
+    def update_exit(self, exit_id: int, location_id=None, destination_id=None):
+        """
+        Record where an exit now sits and leads. An exit without both a location and a destination is
+        dropped from the graph.
+        """
+        if self._edges is None:
+            return
+        new = (location_id, destination_id) if location_id and destination_id else None
+        if self._exits.get(exit_id, None) == new:
+            return
+        self._unlink(exit_id)
+        if new:
+            self._link(exit_id, location_id, destination_id)
+        self._routes.clear()
+
+    def remove_exit(self, exit_id: int):
+        self.update_exit(exit_id)
+
+    def neighbors(self, room) -> dict[int, int]:
+        """
+        Returns {exit id: destination id} for every exit in room.
+        """
+        self._ensure()
+        return self._edges.get(_id(room), dict())
+
+    def _search(self, start: int, goal: int, blocked: set, max_depth, heuristic):
+        edges = self._edges
+        came = {start: None}
+
+        if heuristic is None:
+            # plain breadth-first search; every exit costs the same.
+            frontier = deque([(start, 0)])
+            while frontier:
+                room_id, depth = frontier.popleft()
+                if max_depth is not None and depth >= max_depth:
+                    continue
+                for exit_id, dest_id in edges.get(room_id, dict()).items():
+                    if dest_id in came or exit_id in blocked:
+                        continue
+                    came[dest_id] = (room_id, exit_id)
+                    if dest_id == goal:
+                        return self._unwind(came, goal)
+                    frontier.append((dest_id, depth + 1))
+            return None
+
+        costs = {start: 0}
+        frontier = [(heuristic(start, goal), 0, start)]
+        while frontier:
+            _f, cost, room_id = heapq.heappop(frontier)
+            if room_id == goal:
+                return self._unwind(came, goal)
+            if cost > costs[room_id]:
+                continue
+            if max_depth is not None and cost >= max_depth:
+                continue
+            for exit_id, dest_id in edges.get(room_id, dict()).items():
+                if exit_id in blocked:
+                    continue
+                new_cost = cost + 1
+                if new_cost < costs.get(dest_id, new_cost + 1):
+                    costs[dest_id] = new_cost
+                    came[dest_id] = (room_id, exit_id)
+                    heapq.heappush(
+                        frontier, (new_cost + heuristic(dest_id, goal), new_cost, dest_id)
+                    )
+        return None
+
+    @staticmethod
+    def _unwind(came: dict, goal: int) -> tuple[int, ...]:
+        path = list()
+        step = came[goal]
+        while step:
+            room_id, exit_id = step
+            path.append(exit_id)
+            step = came[room_id]
+        path.reverse()
+        return tuple(path)
+
+    def find_path_ids(
+        self,
+        start,
+        goal,
+        predicate: typing.Optional[typing.Callable] = None,
+        max_depth: typing.Optional[int] = None,
+        heuristic: typing.Optional[typing.Callable] = None,
+    ) -> typing.Optional[tuple[int, ...]]:
+        """
+        Find the shortest route between two rooms as a tuple of exit ids.
+
+        The predicate is evaluated lazily: a route is found ignoring it, then only the exits along that
+        route are checked. A failing exit is excluded and the search is repeated.
+
+        Args:
+            start (room or int): Where to start.
+            goal (room or int): Where to go.
+            predicate (callable, optional): Called with an exit object, returns whether it may be used.
+            max_depth (int, optional): The most exits the route may use.
+            heuristic (callable, optional): (room_id, goal_id) -> estimated steps. Enables A*.
+
+        Returns:
+            tuple of exit ids, or None if there is no route.
+        """
+        self._ensure()
+        start, goal = _id(start), _id(goal)
+        if start == goal:
+            return tuple()
+
+        key = (start, goal, max_depth, heuristic)
+        blocked = set()
+        checked = dict()
+
+        while True:
+            if blocked:
+                path = self._search(start, goal, blocked, max_depth, heuristic)
+            elif key in self._routes:
+                self._routes.move_to_end(key)
+                path = self._routes[key]
+            else:
+                path = self._search(start, goal, blocked, max_depth, heuristic)
+                self._routes[key] = path
+                if len(self._routes) > self.cache_size:
+                    self._routes.popitem(last=False)
+
+            if path is None or predicate is None:
+                return path
+
+            unchecked = [exit_id for exit_id in path if exit_id not in checked]
+            exits = resolve_objects(unchecked) if unchecked else dict()
+            for exit_id in unchecked:
+                checked[exit_id] = bool(
+                    (exit_obj := exits.get(exit_id)) and predicate(exit_obj)
+                )
+
+            if not (failed := {exit_id for exit_id in path if not checked[exit_id]}):
+                return path
+            blocked |= failed
+
+    def find_path(
+        self, start, goal, traverser=None, predicate=None, **kwargs
+    ) -> typing.Optional[list]:
+        """
+        Like find_path_ids(), but returns a list of exit objects. If traverser is given and no predicate
+        is, exits are checked against traverser's traverse lock.
+        """
+        if predicate is None and traverser is not None:
+            predicate = traverse_predicate(traverser)
+        if (path := self.find_path_ids(start, goal, predicate=predicate, **kwargs)) is None:
+            return None
+        exits = resolve_objects(path)
+        return [exits[exit_id] for exit_id in path]
+
+    def distance(self, start, goal, **kwargs) -> typing.Optional[int]:
+        """
+        The number of exits between two rooms, or None if unreachable.
+        """
+        if (path := self.find_path_ids(start, goal, **kwargs)) is None:
+            return None
+        return len(path)
+
+    def rooms_within(self, start, max_depth: int, predicate=None) -> dict[int, int]:
+        """
+        Every room reachable from start using at most max_depth exits.
+
+        Unlike find_path_ids(), the predicate must be checked for every exit expanded here.
+
+        Returns:
+            dict of room id -> distance.
+        """
+        self._ensure()
+        start = _id(start)
+        found = {start: 0}
+        frontier = deque([start])
+        while frontier:
+            room_id = frontier.popleft()
+            depth = found[room_id]
+            if depth >= max_depth:
+                continue
+            edges = self._edges.get(room_id, dict())
+            exits = resolve_objects(edges.keys()) if predicate and edges else dict()
+            for exit_id, dest_id in edges.items():
+                if dest_id in found:
+                    continue
+                if predicate and not (
+                    (exit_obj := exits.get(exit_id)) and predicate(exit_obj)
+                ):
+                    continue
+                found[dest_id] = depth + 1
+                frontier.append(dest_id)
+        return found
+
+
+EXIT_GRAPH = ExitGraph()
+
+
+def _at_object_saved(sender, instance, **kwargs):
+    # post_save fires for every model; only ObjectDB has a destination.
+    if not hasattr(instance, "db_destination_id"):
+        return
+    if instance.db_destination_id is None and instance.pk not in EXIT_GRAPH._exits:
+        return
+    EXIT_GRAPH.update_exit(
+        instance.pk, instance.db_location_id, instance.db_destination_id
+    )
+
+
+def _at_object_deleted(sender, instance, **kwargs):
+    if hasattr(instance, "db_destination_id") and instance.pk in EXIT_GRAPH._exits:
+        EXIT_GRAPH.remove_exit(instance.pk)
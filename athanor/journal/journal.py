@@ -0,0 +1,221 @@
+import datetime
+import threading
+import typing
+from collections import deque
+
+from django.conf import settings
+
+from athanor.utils import utcnow
+
+
+class JournalLine:
+    __slots__ = ("date_created", "text", "kind", "id", "saved")
+
+    def __init__(
+        self,
+        date_created: datetime.datetime,
+        text: str,
+        kind: str = "",
+        id: typing.Optional[int] = None,
+        saved: bool = False,
+    ):
+        self.date_created = date_created
+        self.text = text
+        self.kind = kind
+        # the JournalEntry id, once saved and if the database reports it.
+        self.id = id
+        self.saved = saved
+
+    def __repr__(self):
+        return f"<JournalLine {self.date_created:%Y-%m-%d %H:%M:%S} {self.text[:30]!r}>"
+
+
+def message_text(kwargs: dict) -> tuple[typing.Optional[str], str]:
+    """
+    Pulls (text, kind) out of the outputfunc kwargs at the end of .msg().
+    """
+    if (text := kwargs.get("text", None)) is None:
+        return None, ""
+    kind = ""
+    if isinstance(text, (tuple, list)):
+        if len(text) > 1 and isinstance(text[1], dict):
+            kind = str(text[1].get("type", "") or "")
+        text = text[0] if text else None
+    if (options := kwargs.get("options", None)) and not kind:
+        kind = str(options.get("type", "") or "")
+    if text is None:
+        return None, ""
+    return str(text), kind[:32]
+
+
+class MessageJournal:
+    """
+    An append-only record of what characters were sent.
+
+    The most recent lines per character are kept in memory, in a ring buffer of
+    settings.MESSAGE_JOURNAL_DEPTH lines. If settings.MESSAGE_JOURNAL_PERSIST is set, new lines
+    are also written to JournalEntry every settings.MESSAGE_JOURNAL_FLUSH_INTERVAL seconds, as one
+    bulk insert run on a thread.
+
+    recent() answers from memory when it can and only goes to the database for lines older than
+    the buffer.
+    """
+
+    def __init__(self):
+        self._buffers: dict[int, deque] = dict()
+        self._unsaved: list[tuple[int, JournalLine]] = list()
+        self._lock = threading.Lock()
+        self._scheduled = False
+        self._registered = False
+        self.written = 0
+
+    @property
+    def depth(self) -> int:
+        return settings.MESSAGE_JOURNAL_DEPTH
+
+    def record(self, character, text: str, kind: str = "", when=None):
+        line = JournalLine(when or utcnow(), text, kind)
+        if (buffer := self._buffers.get(character.id, None)) is None:
+            buffer = self._buffers[character.id] = deque(maxlen=self.depth)
+        buffer.append(line)
+        if not settings.MESSAGE_JOURNAL_PERSIST:
+            return
+        with self._lock:
+            self._unsaved.append((character.id, line))
+        if not self._scheduled:
+            self._scheduled = True
+            from twisted.internet import reactor
+
+            if not self._registered:
+                # whatever is still waiting for the timer when the server goes down is saved.
+                reactor.addSystemEventTrigger("before", "shutdown", self.flush)
+                self._registered = True
+            reactor.callLater(settings.MESSAGE_JOURNAL_FLUSH_INTERVAL, self._flush_later)
+
+    def _flush_later(self):
+        from twisted.internet.threads import deferToThread
+
+        self._scheduled = False
+        deferToThread(self.flush)
+
+    def flush(self):
+        """
+        Write every unsaved line to the database now. Safe to call from any thread.
+        """
+        from django.db import close_old_connections
+        from evennia.utils import logger
+        from athanor.journal.models import JournalEntry
+
+        with self._lock:
+            unsaved, self._unsaved = self._unsaved, list()
+            for _character_id, line in unsaved:
+                line.saved = True
+        if not unsaved:
+            return
+        try:
+            entries = JournalEntry.objects.bulk_create(
+                [
+                    JournalEntry(
+                        character_id=character_id,
+                        date_created=line.date_created,
+                        kind=line.kind,
+                        text=line.text,
+                    )
+                    for character_id, line in unsaved
+                ],
+                batch_size=500,
+            )
+            for (_character_id, line), entry in zip(unsaved, entries):
+                line.id = entry.pk
+            self.written += len(unsaved)
+        except Exception:
+            logger.log_trace(f"Could not save {len(unsaved)} journal lines.")
+        finally:
+            close_old_connections()
+
+    def recent(
+        self,
+        character,
+        limit: int = 50,
+        since: typing.Optional[datetime.datetime] = None,
+    ) -> list[JournalLine]:
+        """
+        The last lines a character received, oldest first.
+
+        Args:
+            character (ObjectDB or int): The character.
+            limit (int): The most lines to return.
+            since (datetime, optional): Only return lines from this time onwards.
+        """
+        character_id = character if isinstance(character, int) else character.id
+        buffered = list(self._buffers.get(character_id, ()))
+        if since is not None:
+            buffered = [line for line in buffered if line.date_created >= since]
+        if len(buffered) >= limit or not settings.MESSAGE_JOURNAL_PERSIST:
+            return buffered[-limit:] if limit else list()
+
+        from django.db.models import Q
+        from athanor.journal.models import JournalEntry
+
+        query = JournalEntry.objects.filter(character_id=character_id)
+        skip = 0
+        if buffer := self._buffers.get(character_id, None):
+            # page on (date_created, id) from the oldest buffered line, so saved lines which share
+            # its timestamp but fell out of the buffer aren't lost.
+            oldest = buffer[0]
+            if oldest.id is not None:
+                query = query.filter(
+                    Q(date_created__lt=oldest.date_created)
+                    | Q(date_created=oldest.date_created, id__lt=oldest.id)
+                )
+            else:
+                query = query.filter(date_created__lte=oldest.date_created)
+                if oldest.saved:
+                    # the database didn't report ids, so skip past the buffered lines at that
+                    # timestamp instead. They are the newest rows there.
+                    skip = sum(
+                        1
+                        for line in buffer
+                        if line.saved and line.date_created == oldest.date_created
+                    )
+        if since is not None:
+            query = query.filter(date_created__gte=since)
+        older = [
+            JournalLine(date_created, text, kind, id=entry_id, saved=True)
+            for date_created, text, kind, entry_id in query.order_by(
+                "-date_created", "-id"
+            ).values_list("date_created", "text", "kind", "id")[
+                skip : skip + limit - len(buffered)
+            ]
+        ]
+        older.reverse()
+        return older + buffered
+
+    def forget(self, character):
+        """
+        Drop a character's in-memory buffer, e.g. when it logs out. Its saved lines are kept.
+        """
+        self._buffers.pop(character.id, None)
+
+
+JOURNAL = MessageJournal()
+
+
+def prune(before: datetime.datetime, chunk_size: int = 5000) -> int:
+    """
+    Delete journal lines older than a time, chunk_size rows at a time.
+
+    Returns:
+        int: The number of rows deleted.
+    """
+    from athanor.journal.models import JournalEntry
+
+    deleted = 0
+    while ids := list(
+        JournalEntry.objects.filter(date_created__lt=before).values_list("id", flat=True)[
+            :chunk_size
+        ]
+    ):
+        for i in range(0, len(ids), 500):
+            deleted += JournalEntry.objects.filter(id__in=ids[i : i + 500]).delete()[0]
+    return deleted
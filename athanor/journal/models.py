@@ -0,0 +1,24 @@
+from django.db import models
+
+
+class JournalEntry(models.Model):
+    """
+    One line of text a character received. Written in batches by athanor.journal.journal.
+    """
+
+    character = models.ForeignKey(
+        "objects.ObjectDB", on_delete=models.CASCADE, related_name="journal_entries"
+    )
+    date_created = models.DateTimeField()
+    # the message's "type" option, e.g. "say" or "look", if any.
+    kind = models.CharField(max_length=32, blank=True, default="")
+    text = models.TextField()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["character", "-date_created", "-id"],
+                name="athanor_journal_char_idx",
+            ),
+            models.Index(fields=["date_created"], name="athanor_journal_date_idx"),
+        ]
@@ -0,0 +1,91 @@
+import typing
+from datetime import datetime
+
+from django.db import models
+from django.db.models import Q
+
+from athanor.utils import ip_key, ip_key_range
+
+
+class HostQuerySet(models.QuerySet):
+    def in_range(self, first, last):
+        """
+        Hosts whose IP is between first and last, inclusive.
+        """
+        return self.filter(ip_numeric__gte=ip_key(first), ip_numeric__lte=ip_key(last))
+
+    def in_network(self, network):
+        """
+        Hosts inside a network given in CIDR notation, such as "192.168.0.0/16".
+        """
+        first, last = ip_key_range(network)
+        return self.filter(ip_numeric__gte=first, ip_numeric__lte=last)
+
+
+class LoginRecordQuerySet(models.QuerySet):
+    def for_account(self, account):
+        return self.filter(account=account)
+
+    def for_host(self, host):
+        return self.filter(host=host)
+
+    def for_ip(self, ip):
+        return self.filter(host__ip_numeric=ip_key(ip))
+
+    def in_range(self, first, last):
+        return self.filter(
+            host__ip_numeric__gte=ip_key(first), host__ip_numeric__lte=ip_key(last)
+        )
+
+    def in_network(self, network):
+        first, last = ip_key_range(network)
+        return self.filter(host__ip_numeric__gte=first, host__ip_numeric__lte=last)
+
+    def account_ids(self):
+        """
+        The distinct ids of the accounts in these records, e.g. everyone seen from a subnet.
+        """
+        return self.order_by().values_list("account_id", flat=True).distinct()
+
+    def page(
+        self, cursor: typing.Optional[str] = None, size: int = 50
+    ) -> tuple[list, typing.Optional[str]]:
+        """
+        Keyset pagination, newest first. Unlike OFFSET, every page costs the same no matter how deep
+        it is, and rows added in the meantime don't shift pages around.
+
+        Args:
+            cursor (str, optional): The cursor returned with the previous page.
+            size (int): Records per page.
+
+        Returns:
+            (records, cursor): The cursor for the next page is None on the last page.
+        """
+        queryset = self.order_by("-date_created", "-id")
+        if cursor:
+            date_created, record_id = decode_cursor(cursor)
+            queryset = queryset.filter(
+                Q(date_created__lt=date_created)
+                | Q(date_created=date_created, id__lt=record_id)
+            )
+        records = list(queryset[: size + 1])
+        if len(records) <= size:
+            return records, None
+        records = records[:size]
+        return records, encode_cursor(records[-1])
+
+
+def encode_cursor(record) -> str:
+    return f"{record.date_created.isoformat()}|{record.id}"
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        date_created, record_id = cursor.rsplit("|", 1)
+        return datetime.fromisoformat(date_created), int(record_id)
+    except ValueError:
+        raise ValueError(f"Invalid page cursor: {cursor}")
+
+
+HostManager = models.Manager.from_queryset(HostQuerySet)
+LoginRecordManager = models.Manager.from_queryset(LoginRecordQuerySet)
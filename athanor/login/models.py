@@ -1,9 +1,24 @@
 from django.db import models
 
+from athanor.login.managers import HostManager, LoginRecordManager
+from athanor.utils import ip_key
+
+
 class Host(models.Model):
     ip = models.GenericIPAddressField(unique=True)
+    # ip_key() of ip. Fixed-width hex rather than an integer column because IPv6 needs 128 bits.
+    ip_numeric = models.CharField(max_length=32, db_index=True, default="", editable=False)
     hostname = models.CharField(max_length=255, null=True)
 
+    objects = HostManager()
+
+    def save(self, *args, **kwargs):
+        self.ip_numeric = ip_key(self.ip)
+        update_fields = kwargs.get("update_fields", None)
+        if update_fields is not None and "ip" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "ip_numeric"}
+        super().save(*args, **kwargs)
+
 
 class LoginRecord(models.Model):
     host = models.ForeignKey(Host, on_delete=models.PROTECT, related_name="records")
@@ -12,4 +27,40 @@ class LoginRecord(models.Model):
     )
     is_success = models.BooleanField(default=False)
     reason = models.CharField(max_length=50, null=True, blank=False)
-    date_created = models.DateTimeField(auto_now_add=True, editable=True)
\ No newline at end of file
+    date_created = models.DateTimeField(auto_now_add=True, editable=True)
+
+    objects = LoginRecordManager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["account", "-date_created", "-id"],
+                name="athanor_login_account_idx",
+            ),
+            models.Index(
+                fields=["host", "-date_created", "-id"], name="athanor_login_host_idx"
+            ),
+            models.Index(fields=["-date_created", "-id"], name="athanor_login_date_idx"),
+        ]
+
+
+class LoginSummary(models.Model):
+    """
+    Login attempts per account, host and day, kept after the raw LoginRecords are pruned.
+    """
+
+    account = models.ForeignKey(
+        "accounts.AccountDB", on_delete=models.CASCADE, related_name="login_summaries"
+    )
+    host = models.ForeignKey(Host, on_delete=models.PROTECT, related_name="summaries")
+    day = models.DateField()
+    successes = models.PositiveIntegerField(default=0)
+    failures = models.PositiveIntegerField(default=0)
+    first_seen = models.DateTimeField()
+    last_seen = models.DateTimeField()
+
+    class Meta:
+        unique_together = ("account", "host", "day")
+        indexes = [
+            models.Index(fields=["host", "-day"], name="athanor_loginsum_host_idx"),
+        ]
@@ -0,0 +1,200 @@
+"""
+Fills in Host.hostname with reverse DNS, off the reactor thread.
+"""
+import socket
+import threading
+import time
+import typing
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+
+def socket_backend(ip: str) -> typing.Optional[str]:
+    """
+    The default backend: a blocking reverse lookup through the system resolver.
+    """
+    try:
+        return socket.gethostbyaddr(ip)[0]
+    except (OSError, UnicodeError):
+        return None
+
+
+class HostnameResolver:
+    """
+    Resolves IP addresses to hostnames in a small thread pool and writes them to Host rows.
+
+    Each address is looked up at most once at a time, and results are cached for a while:
+    positive_ttl seconds for a hostname, negative_ttl seconds for a failed lookup. Resolved
+    hostnames are written in batches, either when batch_size of them are waiting or when the pool
+    runs out of lookups.
+
+    The backend is any callable taking an IP string and returning a hostname or None, so tests can
+    swap in a stub with set_backend().
+    """
+
+    def __init__(
+        self,
+        backend: typing.Optional[typing.Callable] = None,
+        max_workers: int = 4,
+        max_pending: int = 1000,
+        positive_ttl: float = 86400.0,
+        negative_ttl: float = 3600.0,
+        batch_size: int = 50,
+    ):
+        self.backend = backend
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.batch_size = batch_size
+        self._executor: typing.Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        # ip -> (hostname or None, expiry on the monotonic clock)
+        self._cache: dict[str, tuple[typing.Optional[str], float]] = dict()
+        self._in_flight: set[str] = set()
+        self._resolved: dict[str, str] = dict()
+        self._writing = 0
+        self.lookups = 0
+        self.cache_hits = 0
+        self.dropped = 0
+
+    @classmethod
+    def from_settings(cls):
+        from evennia.utils.utils import class_from_module
+
+        return cls(
+            backend=class_from_module(settings.HOSTNAME_RESOLVER_BACKEND),
+            max_workers=settings.HOSTNAME_RESOLVER_WORKERS,
+            positive_ttl=settings.HOSTNAME_RESOLVER_TTL,
+            negative_ttl=settings.HOSTNAME_RESOLVER_NEGATIVE_TTL,
+        )
+
+    def set_backend(self, backend: typing.Callable):
+        with self._lock:
+            self.backend = backend
+            self._cache.clear()
+
+    def cached(self, ip: str) -> typing.Optional[str]:
+        """
+        The cached hostname for an IP, or None if it's unknown, unresolvable or expired.
+        """
+        if (entry := self._cache.get(ip, None)) is None or entry[1] < time.monotonic():
+            return None
+        return entry[0]
+
+    def queue(self, ip: str) -> bool:
+        """
+        Ask for ip to be resolved and saved to its Host. Returns immediately.
+
+        Returns:
+            bool: False if the ip didn't need resolving, was already being resolved, or the queue
+                was full.
+        """
+        if not ip:
+            return False
+        with self._lock:
+            if ip in self._in_flight:
+                return False
+            if (entry := self._cache.get(ip, None)) is not None:
+                if entry[1] >= time.monotonic():
+                    self.cache_hits += 1
+                    return False
+                del self._cache[ip]
+            if len(self._in_flight) >= self.max_pending:
+                # the next login from this address will try again.
+                self.dropped += 1
+                return False
+            self._in_flight.add(ip)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="athanor-rdns"
+                )
+            executor = self._executor
+        executor.submit(self._resolve, ip)
+        return True
+
+    def _resolve(self, ip: str):
+        from evennia.utils import logger
+
+        hostname = None
+        try:
+            hostname = (self.backend or socket_backend)(ip)
+        except Exception:
+            logger.log_trace(f"Reverse DNS lookup for {ip} failed.")
+
+        with self._lock:
+            self.lookups += 1
+            ttl = self.positive_ttl if hostname else self.negative_ttl
+            self._cache[ip] = (hostname, time.monotonic() + ttl)
+            if hostname:
+                self._resolved[ip] = hostname
+            self._in_flight.discard(ip)
+            batch = None
+            if self._resolved and (
+                len(self._resolved) >= self.batch_size or not self._in_flight
+            ):
+                batch, self._resolved = self._resolved, dict()
+                self._writing += 1
+
+        if batch:
+            try:
+                self._write(batch)
+            finally:
+                with self._lock:
+                    self._writing -= 1
+        with self._lock:
+            if self._is_idle():
+                self._idle.notify_all()
+
+    def _is_idle(self) -> bool:
+        return not (self._in_flight or self._resolved or self._writing)
+
+    @staticmethod
+    def _write(batch: dict[str, str]):
+        from django.db import close_old_connections
+        from evennia.utils import logger
+        from athanor.login.models import Host
+
+        try:
+            hosts = list(Host.objects.filter(ip__in=batch.keys()).only("id", "ip", "hostname"))
+            changed = list()
+            for host in hosts:
+                if host.hostname != (hostname := batch[host.ip][:255]):
+                    host.hostname = hostname
+                    changed.append(host)
+            Host.objects.bulk_update(changed, ["hostname"])
+        except Exception:
+            logger.log_trace("Could not save resolved hostnames.")
+        finally:
+            close_old_connections()
+
+    def flush(self, timeout: typing.Optional[float] = None) -> bool:
+        """
+        Block until every queued lookup has finished and been saved.
+
+        Returns:
+            bool: False if timeout ran out first.
+        """
+        with self._lock:
+            return self._idle.wait_for(self._is_idle, timeout=timeout)
+
+
+_RESOLVER: typing.Optional[HostnameResolver] = None
+
+
+def get_resolver() -> HostnameResolver:
+    global _RESOLVER
+    if _RESOLVER is None:
+        _RESOLVER = HostnameResolver.from_settings()
+    return _RESOLVER
+
+
+def queue_hostname(ip: str) -> bool:
+    """
+    Queue an IP for reverse DNS if settings.HOSTNAME_RESOLVER_ENABLED is set.
+    """
+    if not settings.HOSTNAME_RESOLVER_ENABLED:
+        return False
+    return get_resolver().queue(ip)
@@ -0,0 +1,196 @@
+"""
+Retention for login history.
+
+Raw LoginRecords older than the retention period are folded into per-(account, host, day)
+LoginSummary rows and deleted. Optionally, each chunk is also exported to a gzipped JSON Lines file
+before it is deleted.
+
+Call apply_retention_policy() periodically, for instance from a daily Script.
+"""
+import datetime
+import gzip
+import typing
+from collections import defaultdict
+from pathlib import Path
+
+import orjson
+from django.conf import settings
+from django.db import transaction
+
+from athanor.utils import utcnow
+
+_FIELDS = ("id", "account_id", "host_id", "host__ip", "is_success", "reason", "date_created")
+
+
+class RetentionResult:
+    __slots__ = ("pruned", "summarized", "chunks", "archives")
+
+    def __init__(self):
+        self.pruned = 0
+        self.summarized = 0
+        self.chunks = 0
+        self.archives: list[Path] = list()
+
+    def __repr__(self):
+        return (
+            f"<RetentionResult pruned={self.pruned} summarized={self.summarized} "
+            f"chunks={self.chunks} archives={len(self.archives)}>"
+        )
+
+
+def _summarize(rows: list[dict]) -> dict[tuple, list]:
+    # (account id, host id, day) -> [successes, failures, first seen, last seen]
+    out = dict()
+    for row in rows:
+        when = row["date_created"]
+        key = (row["account_id"], row["host_id"], when.date())
+        if (entry := out.get(key, None)) is None:
+            entry = out[key] = [0, 0, when, when]
+        entry[0 if row["is_success"] else 1] += 1
+        if when < entry[2]:
+            entry[2] = when
+        if when > entry[3]:
+            entry[3] = when
+    return out
+
+
+def _merge_summaries(summaries: dict[tuple, list]):
+    from athanor.login.models import LoginSummary
+
+    by_day = defaultdict(set)
+    for account_id, host_id, day in summaries:
+        by_day[day].add(account_id)
+    existing = dict()
+    for day, account_ids in by_day.items():
+        for summary in LoginSummary.objects.select_for_update().filter(
+            day=day, account_id__in=account_ids
+        ):
+            existing[(summary.account_id, summary.host_id, summary.day)] = summary
+
+    update, create = list(), list()
+    for key, (successes, failures, first_seen, last_seen) in summaries.items():
+        if (summary := existing.get(key, None)) is not None:
+            summary.successes += successes
+            summary.failures += failures
+            summary.first_seen = min(summary.first_seen, first_seen)
+            summary.last_seen = max(summary.last_seen, last_seen)
+            update.append(summary)
+        else:
+            account_id, host_id, day = key
+            create.append(
+                LoginSummary(
+                    account_id=account_id,
+                    host_id=host_id,
+                    day=day,
+                    successes=successes,
+                    failures=failures,
+                    first_seen=first_seen,
+                    last_seen=last_seen,
+                )
+            )
+    LoginSummary.objects.bulk_update(
+        update, ["successes", "failures", "first_seen", "last_seen"]
+    )
+    LoginSummary.objects.bulk_create(create)
+
+
+def _write_archive(archive_dir: Path, rows: list[dict]) -> tuple[Path, Path]:
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    first, last = rows[0], rows[-1]
+    name = (
+        f"logins-{first['date_created']:%Y%m%d%H%M%S}-{first['id']}"
+        f"-{last['id']}.jsonl.gz"
+    )
+    path = archive_dir / name
+    temp = path.with_name(name + ".tmp")
+    with gzip.open(temp, "wb") as f:
+        for row in rows:
+            f.write(orjson.dumps(row))
+            f.write(b"\n")
+    return temp, path
+
+
+def compact_login_records(
+    before: datetime.datetime,
+    chunk_size: int = 5000,
+    archive_dir: typing.Optional[Path] = None,
+    max_chunks: typing.Optional[int] = None,
+) -> RetentionResult:
+    """
+    Fold every LoginRecord created before a time into LoginSummary rows, then delete it.
+
+    Work happens in chunks of chunk_size records, oldest first, with each chunk in its own short
+    transaction, so the table is never locked for long and an interrupted run loses nothing.
+
+    Args:
+        before (datetime): Records older than this are compacted.
+        chunk_size (int): Records per transaction.
+        archive_dir (Path, optional): If given, each chunk is also written there as a gzipped
+            JSON Lines file before being deleted. A file is only renamed into place once its
+            chunk's transaction commits.
+        max_chunks (int, optional): Stop after this many chunks.
+
+    Returns:
+        RetentionResult
+    """
+    from athanor.login.models import LoginRecord
+
+    result = RetentionResult()
+    if archive_dir is not None:
+        archive_dir = Path(archive_dir)
+
+    while max_chunks is None or result.chunks < max_chunks:
+        temp = None
+        try:
+            with transaction.atomic():
+                rows = list(
+                    LoginRecord.objects.filter(date_created__lt=before)
+                    .order_by("date_created", "id")
+                    .values(*_FIELDS)[:chunk_size]
+                )
+                if not rows:
+                    break
+                summaries = _summarize(rows)
+                _merge_summaries(summaries)
+                if archive_dir is not None:
+                    temp, path = _write_archive(archive_dir, rows)
+                    transaction.on_commit(lambda t=temp, p=path: t.replace(p))
+                    result.archives.append(path)
+                ids = [row["id"] for row in rows]
+                for i in range(0, len(ids), 500):
+                    LoginRecord.objects.filter(id__in=ids[i : i + 500]).delete()
+        except Exception:
+            if temp is not None:
+                temp.unlink(missing_ok=True)
+            raise
+
+        result.pruned += len(rows)
+        result.summarized += len(summaries)
+        result.chunks += 1
+        if len(rows) < chunk_size:
+            break
+
+    return result
+
+
+def read_archive(path: Path) -> typing.Iterator[dict]:
+    """
+    Yields the records stored in an archive file written by compact_login_records().
+    """
+    with gzip.open(path, "rb") as f:
+        for line in f:
+            if line.strip():
+                yield orjson.loads(line)
+
+
+def apply_retention_policy(now: typing.Optional[datetime.datetime] = None, **kwargs):
+    """
+    Run compact_login_records() according to settings.LOGIN_RETENTION_DAYS,
+    LOGIN_RETENTION_CHUNK_SIZE and LOGIN_ARCHIVE_DIR. Does nothing if LOGIN_RETENTION_DAYS is None.
+    """
+    if (days := settings.LOGIN_RETENTION_DAYS) is None:
+        return None
+    before = (now or utcnow()) - datetime.timedelta(days=days)
+    kwargs.setdefault("chunk_size", settings.LOGIN_RETENTION_CHUNK_SIZE)
+    kwargs.setdefault("archive_dir", settings.LOGIN_ARCHIVE_DIR)
+    return compact_login_records(before, **kwargs)
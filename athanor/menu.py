@@ -1,5 +1,6 @@
 from evennia import CmdSet
 from .commands import AthanorCommand
+from .cmdsets import VersionedCmdSetMixin
 
 
 class AthanorMenuCommand(AthanorCommand):
@@ -10,8 +11,19 @@ class AthanorMenuCommand(AthanorCommand):
 
     @property
     def true_cmdset(self):
-        cmdsets = {c.key: c for c in self.caller.cmdset.all()}
-        return cmdsets.get("menu", None)
+        stack = self.caller.cmdset.all()
+        # the menu may have been removed some other way than end_menu(), e.g. cmdset.clear().
+        if (active := self.caller.ndb.active_menu) is not None and any(
+            cmdset is active for cmdset in stack
+        ):
+            return active
+        # Not tracked (e.g. the menu predates a reload), so find it once and remember it.
+        self.caller.ndb.active_menu = None
+        for cmdset in reversed(stack):
+            if cmdset.key == "menu":
+                self.caller.ndb.active_menu = cmdset
+                return cmdset
+        return None
 
 
 class CmdExit(AthanorMenuCommand):
@@ -35,7 +47,7 @@ class CmdMenu(AthanorMenuCommand):
         self.true_cmdset.render_menu()
 
 
-class MenuCmdSet(CmdSet):
+class MenuCmdSet(VersionedCmdSetMixin, CmdSet):
     # generally should not be changed.
     key = "menu"
     # This will be used to set the help_category on all menu-commands.
@@ -44,16 +56,25 @@ class MenuCmdSet(CmdSet):
     priority = 50
     account_caller = False
 
+    # tuple of command classes -> their indexes in menu_sort order. Shared by all menus.
+    _sort_orders: dict[tuple, tuple[int, ...]] = dict()
+    _commands_sorted = None
+    _commands_sorted_version = -1
+
     def at_cmdset_creation(self):
         for cmd in self.command_classes:
             cmd.help_category = self.help_category
             cmd.account_caller = self.account_caller
             self.add(cmd)
+        if self.cmdsetobj:
+            self.cmdsetobj.ndb.active_menu = self
 
     def at_post_cmd(self, cmd):
         pass
 
     def end_menu(self):
+        if self.cmdsetobj.ndb.active_menu is self:
+            self.cmdsetobj.ndb.active_menu = None
         self.cmdsetobj.cmdset.remove(self)
         self.cmdsetobj.msg(f"Leaving the {self.help_category}.")
 
@@ -61,12 +82,20 @@ class MenuCmdSet(CmdSet):
         pass
 
     def get_commands(self):
-        if hasattr(self, "commands_sorted"):
-            return self.commands_sorted
-        commands = self.commands.copy()
-        commands.sort(key=lambda x: getattr(x, "menu_sort", 0))
-        self.commands_sorted = commands
-        return commands
+        if self._commands_sorted_version == self.merge_version:
+            return self._commands_sorted
+        classes = tuple(type(cmd) for cmd in self.commands)
+        if (order := self._sort_orders.get(classes, None)) is None:
+            order = tuple(
+                sorted(
+                    range(len(classes)),
+                    key=lambda i: getattr(classes[i], "menu_sort", 0),
+                )
+            )
+            self._sort_orders[classes] = order
+        self._commands_sorted = [self.commands[i] for i in order]
+        self._commands_sorted_version = self.merge_version
+        return self._commands_sorted
 
     @property
     def msg(self):
@@ -0,0 +1,40 @@
+# Generated by Django 4.1.11 on 2026-10-19 10:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("objects", "0013_defaultobject_alter_objectdb_id_defaultcharacter_and_more"),
+        ("athanor", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RoomCoordinates",
+            fields=[
+                (
+                    "id",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="room_coordinates",
+                        serialize=False,
+                        to="objects.objectdb",
+                    ),
+                ),
+                ("zone", models.CharField(blank=True, default="", max_length=255)),
+                ("x", models.IntegerField(default=0)),
+                ("y", models.IntegerField(default=0)),
+                ("z", models.IntegerField(default=0)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["zone", "x", "y", "z"], name="athanor_room_zxyz_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,105 @@
+# Generated by Django 4.1.11 on 2026-10-19 12:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("objects", "0013_defaultobject_alter_objectdb_id_defaultcharacter_and_more"),
+        ("accounts", "0012_defaultaccount_alter_accountdb_id_account_bot_and_more"),
+        ("athanor", "0002_roomcoordinates"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="accountplaytime",
+            index=models.Index(
+                fields=["-total_playtime"], name="athanor_acct_total_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="characterplaytime",
+            index=models.Index(
+                fields=["-total_playtime"], name="athanor_char_total_idx"
+            ),
+        ),
+        migrations.CreateModel(
+            name="AccountPlaytimeBucket",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "period",
+                    models.CharField(
+                        choices=[("h", "Hour"), ("d", "Day")], max_length=1
+                    ),
+                ),
+                ("start", models.DateTimeField()),
+                ("seconds", models.PositiveIntegerField(default=0)),
+                (
+                    "account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="playtime_buckets",
+                        to="accounts.accountdb",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("account", "period", "start")},
+                "indexes": [
+                    models.Index(
+                        fields=["period", "start", "account", "seconds"],
+                        name="athanor_acct_bucket_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="CharacterPlaytimeBucket",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "period",
+                    models.CharField(
+                        choices=[("h", "Hour"), ("d", "Day")], max_length=1
+                    ),
+                ),
+                ("start", models.DateTimeField()),
+                ("seconds", models.PositiveIntegerField(default=0)),
+                (
+                    "character",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="playtime_buckets",
+                        to="objects.objectdb",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("character", "period", "start")},
+                "indexes": [
+                    models.Index(
+                        fields=["period", "start", "character", "seconds"],
+                        name="athanor_char_bucket_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.1.11 on 2026-10-19 13:00
+
+from django.db import migrations, models
+
+import athanor.utils
+
+
+def fill_ip_numeric(apps, schema_editor):
+    Host = apps.get_model("athanor", "Host")
+    batch = list()
+    for host in Host.objects.only("id", "ip").iterator(chunk_size=1000):
+        host.ip_numeric = athanor.utils.ip_key(host.ip)
+        batch.append(host)
+        if len(batch) >= 1000:
+            Host.objects.bulk_update(batch, ["ip_numeric"])
+            batch.clear()
+    if batch:
+        Host.objects.bulk_update(batch, ["ip_numeric"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("athanor", "0003_playtime_buckets"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="host",
+            name="ip_numeric",
+            field=models.CharField(
+                db_index=True, default="", editable=False, max_length=32
+            ),
+        ),
+        migrations.RunPython(fill_ip_numeric, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="loginrecord",
+            index=models.Index(
+                fields=["account", "-date_created", "-id"],
+                name="athanor_login_account_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="loginrecord",
+            index=models.Index(
+                fields=["host", "-date_created", "-id"], name="athanor_login_host_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="loginrecord",
+            index=models.Index(
+                fields=["-date_created", "-id"], name="athanor_login_date_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 4.1.11 on 2026-10-19 14:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("athanor", "0004_login_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LoginSummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("successes", models.PositiveIntegerField(default=0)),
+                ("failures", models.PositiveIntegerField(default=0)),
+                ("first_seen", models.DateTimeField()),
+                ("last_seen", models.DateTimeField()),
+                (
+                    "account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="login_summaries",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "host",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="summaries",
+                        to="athanor.host",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("account", "host", "day")},
+                "indexes": [
+                    models.Index(fields=["host", "-day"], name="athanor_loginsum_host_idx")
+                ],
+            },
+        ),
+    ]
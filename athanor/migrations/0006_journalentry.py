@@ -0,0 +1,50 @@
+# Generated by Django 4.1.11 on 2026-10-19 15:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("objects", "0013_defaultobject_alter_objectdb_id_defaultcharacter_and_more"),
+        ("athanor", "0005_loginsummary"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="JournalEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date_created", models.DateTimeField()),
+                ("kind", models.CharField(blank=True, default="", max_length=32)),
+                ("text", models.TextField()),
+                (
+                    "character",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="journal_entries",
+                        to="objects.objectdb",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["character", "-date_created", "-id"],
+                        name="athanor_journal_char_idx",
+                    ),
+                    models.Index(
+                        fields=["date_created"], name="athanor_journal_date_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,209 @@
+import datetime
+import threading
+import time
+import typing
+from collections import defaultdict
+
+from django.conf import settings
+
+from athanor.playtime.writer import PLAYTIME_WRITER
+from athanor.utils import utcnow
+
+HOUR = "h"
+DAY = "d"
+
+
+def bucket_start(when: datetime.datetime, period: str) -> datetime.datetime:
+    when = when.replace(minute=0, second=0, microsecond=0)
+    if period == DAY:
+        when = when.replace(hour=0)
+    return when
+
+
+def period_start(window: str, now: typing.Optional[datetime.datetime] = None):
+    """
+    The start of the current "day", "week" (starting Monday) or "month", in UTC.
+    """
+    now = bucket_start(now or utcnow(), DAY)
+    if window == "day":
+        return now
+    if window == "week":
+        return now - datetime.timedelta(days=now.weekday())
+    if window == "month":
+        return now.replace(day=1)
+    raise ValueError(f"Unknown leaderboard window: {window}")
+
+
+class PlaytimeHistory:
+    """
+    Accumulates playtime into hourly and daily buckets in memory, and periodically adds the totals
+    to AccountPlaytimeBucket and CharacterPlaytimeBucket.
+
+    Everyone online is credited the same number of seconds each tick, so a flush groups its rows by
+    (bucket, seconds) and needs only a couple of UPDATE queries per bucket, however many players
+    are online. Flushes are run by PLAYTIME_WRITER, off the reactor thread.
+    """
+
+    def __init__(self):
+        # (kind, period, start) -> {object id: seconds}
+        self._pending: dict[tuple, dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._registered = False
+
+    @property
+    def periods(self) -> tuple[str, ...]:
+        if getattr(settings, "PLAYTIME_HISTORY_HOURLY", True):
+            return HOUR, DAY
+        return (DAY,)
+
+    def add(self, account, characters, seconds: int, when=None):
+        """
+        Credit an account and the characters it has online with seconds of playtime.
+        """
+        if not seconds:
+            return
+        if when is None:
+            when = utcnow()
+        if not self._registered:
+            from twisted.internet import reactor
+
+            reactor.addSystemEventTrigger("before", "shutdown", self.shutdown)
+            self._registered = True
+        with self._lock:
+            for period in self.periods:
+                start = bucket_start(when, period)
+                self._pending[("account", period, start)][account.id] += seconds
+                if characters:
+                    bucket = self._pending[("character", period, start)]
+                    for character in characters:
+                        bucket[character.id] += seconds
+
+    def flush_due(self):
+        """
+        Flush if settings.PLAYTIME_HISTORY_FLUSH_INTERVAL seconds have passed since the last flush.
+        """
+        interval = getattr(settings, "PLAYTIME_HISTORY_FLUSH_INTERVAL", 60)
+        if time.monotonic() - self._last_flush >= interval:
+            self.flush()
+
+    def flush(self):
+        """
+        Queue everything accumulated so far to be written. Use PLAYTIME_WRITER.flush() to wait for
+        it to land.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(lambda: defaultdict(int))
+            self._last_flush = time.monotonic()
+        if pending:
+            PLAYTIME_WRITER.submit(("history",), write_buckets, pending)
+
+    def shutdown(self):
+        self.flush()
+        PLAYTIME_WRITER.flush()
+
+
+PLAYTIME_HISTORY = PlaytimeHistory()
+
+
+def _bucket_model(kind: str):
+    from athanor.playtime.models import AccountPlaytimeBucket, CharacterPlaytimeBucket
+
+    if kind == "account":
+        return AccountPlaytimeBucket, "account_id"
+    return CharacterPlaytimeBucket, "character_id"
+
+
+def write_buckets(pending: dict[tuple, dict[int, int]]):
+    from django.db import transaction
+    from django.db.models import F
+
+    for (kind, period, start), credits in pending.items():
+        model, field = _bucket_model(kind)
+        by_seconds = defaultdict(list)
+        for obj_id, seconds in credits.items():
+            by_seconds[seconds].append(obj_id)
+        with transaction.atomic():
+            model.objects.bulk_create(
+                [model(period=period, start=start, **{field: obj_id}) for obj_id in credits],
+                ignore_conflicts=True,
+            )
+            for seconds, ids in by_seconds.items():
+                model.objects.filter(
+                    period=period, start=start, **{f"{field}__in": ids}
+                ).update(seconds=F("seconds") + seconds)
+
+
+def _resolve(kind: str, rows: list[tuple[int, int]]) -> list[tuple[typing.Any, int]]:
+    if kind == "account":
+        from evennia.accounts.models import AccountDB as model
+    else:
+        from evennia.objects.models import ObjectDB as model
+    found = model.objects.in_bulk([obj_id for obj_id, _total in rows])
+    return [(found[obj_id], total) for obj_id, total in rows if obj_id in found]
+
+
+def leaderboard(
+    kind: str = "account",
+    window: str = "week",
+    limit: int = 20,
+    since: typing.Optional[datetime.datetime] = None,
+    resolve: bool = True,
+) -> list[tuple[typing.Any, int]]:
+    """
+    The players (or characters) with the most playtime, most first.
+
+    Args:
+        kind (str): "account" or "character".
+        window (str): "day", "week", "month" or "all".
+        limit (int): How many to return.
+        since (datetime, optional): Count from this time instead of the start of the window. It is
+            rounded down to the hour, or the day if hourly history is disabled.
+        resolve (bool): If False, return ids instead of objects.
+
+    Returns:
+        list of (account or character, seconds).
+    """
+    from django.db.models import Sum
+    from athanor.playtime.models import AccountPlaytime, CharacterPlaytime
+
+    if window == "all" and since is None:
+        model = AccountPlaytime if kind == "account" else CharacterPlaytime
+        rows = list(
+            model.objects.filter(total_playtime__gt=0)
+            .order_by("-total_playtime")
+            .values_list("id", "total_playtime")[:limit]
+        )
+    else:
+        if since is None:
+            since, period = period_start(window), DAY
+        else:
+            period = HOUR if HOUR in PLAYTIME_HISTORY.periods else DAY
+            since = bucket_start(since, period)
+        model, field = _bucket_model(kind)
+        rows = list(
+            model.objects.filter(period=period, start__gte=since)
+            .values(field)
+            .annotate(total=Sum("seconds"))
+            .order_by("-total")
+            .values_list(field, "total")[:limit]
+        )
+
+    if not resolve:
+        return rows
+    return _resolve(kind, rows)
+
+
+def prune(before: datetime.datetime, period: str = HOUR) -> int:
+    """
+    Delete history buckets of one period which started before a given time. Hourly buckets are
+    rarely needed for long, so they are the default.
+
+    Returns:
+        int: The number of rows deleted.
+    """
+    deleted = 0
+    for kind in ("account", "character"):
+        model, _field = _bucket_model(kind)
+        deleted += model.objects.filter(period=period, start__lt=before).delete()[0]
+    return deleted
@@ -11,6 +11,11 @@ class AccountPlaytime(models.Model):
     last_login = models.DateTimeField(null=True, blank=True)
     last_logout = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["-total_playtime"], name="athanor_acct_total_idx"),
+        ]
+
     def __str__(self):
         return str(self.id)
 
@@ -26,6 +31,11 @@ class CharacterPlaytime(models.Model):
     last_login = models.DateTimeField(null=True, blank=True)
     last_logout = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["-total_playtime"], name="athanor_char_total_idx"),
+        ]
+
     def __str__(self):
         return str(self.id)
 
@@ -59,4 +69,56 @@ class AccountOwner(models.Model):
     )
 
     def __str__(self):
-        return str(self.id)
\ No newline at end of file
+        return str(self.id)
+
+
+class PlaytimeBucket(models.Model):
+    """
+    Seconds played during one hour or one day. Rows are written by athanor.playtime.history.
+    """
+
+    HOUR = "h"
+    DAY = "d"
+    PERIOD_CHOICES = ((HOUR, "Hour"), (DAY, "Day"))
+
+    period = models.CharField(max_length=1, choices=PERIOD_CHOICES)
+    start = models.DateTimeField()
+    seconds = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+
+class AccountPlaytimeBucket(PlaytimeBucket):
+    account = models.ForeignKey(
+        "accounts.AccountDB",
+        on_delete=models.CASCADE,
+        related_name="playtime_buckets",
+    )
+
+    class Meta:
+        unique_together = ("account", "period", "start")
+        # covers the leaderboard query: filter on period and start, sum seconds per account.
+        indexes = [
+            models.Index(
+                fields=["period", "start", "account", "seconds"],
+                name="athanor_acct_bucket_idx",
+            ),
+        ]
+
+
+class CharacterPlaytimeBucket(PlaytimeBucket):
+    character = models.ForeignKey(
+        "objects.ObjectDB",
+        on_delete=models.CASCADE,
+        related_name="playtime_buckets",
+    )
+
+    class Meta:
+        unique_together = ("character", "period", "start")
+        indexes = [
+            models.Index(
+                fields=["period", "start", "character", "seconds"],
+                name="athanor_char_bucket_idx",
+            ),
+        ]
@@ -0,0 +1,155 @@
+import threading
+import typing
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+
+class PlaytimeWriter:
+    """
+    Runs playtime bookkeeping writes off the reactor thread.
+
+    Writes are queued under a key (such as ("character", 5)). Writes that share a key run one at a
+    time in the order they were submitted, while different keys run in parallel on a small thread
+    pool. With settings.PLAYTIME_WRITES_ASYNC set to False everything runs immediately instead,
+    which is handy for tests and scripts.
+    """
+
+    def __init__(self):
+        self._executor: typing.Optional[ThreadPoolExecutor] = None
+        self._queues: dict[typing.Hashable, deque] = dict()
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0
+        self.errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return getattr(settings, "PLAYTIME_WRITES_ASYNC", True)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "PLAYTIME_WRITER_WORKERS", 2),
+                thread_name_prefix="athanor-playtime",
+            )
+            from twisted.internet import reactor
+
+            reactor.addSystemEventTrigger("before", "shutdown", self.shutdown)
+        return self._executor
+
+    def submit(self, key: typing.Hashable, func: typing.Callable, *args, **kwargs):
+        """
+        Queue func(*args, **kwargs) to run after every write already queued under key.
+        """
+        if not self.enabled:
+            func(*args, **kwargs)
+            return
+        with self._lock:
+            self._pending += 1
+            if (queue := self._queues.get(key, None)) is not None:
+                # a worker is already draining this key; it will get to this one.
+                queue.append((func, args, kwargs))
+                return
+            self._queues[key] = deque([(func, args, kwargs)])
+        self._get_executor().submit(self._drain, key)
+
+    def _drain(self, key):
+        from django.db import close_old_connections
+        from evennia.utils import logger
+
+        while True:
+            with self._lock:
+                queue = self._queues[key]
+                if not queue:
+                    del self._queues[key]
+                    break
+                func, args, kwargs = queue.popleft()
+            try:
+                func(*args, **kwargs)
+            except Exception:
+                failed = True
+                logger.log_trace(f"Playtime write for {key} failed.")
+            else:
+                failed = False
+            finally:
+                with self._lock:
+                    self.errors += failed
+                    self._pending -= 1
+                    if not self._pending:
+                        self._idle.notify_all()
+        close_old_connections()
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def flush(self, timeout: typing.Optional[float] = None) -> bool:
+        """
+        Block until every queued write has run. Call this at shutdown, and in tests before checking
+        the database.
+
+        Returns:
+            bool: False if timeout ran out first.
+        """
+        with self._lock:
+            return self._idle.wait_for(lambda: not self._pending, timeout=timeout)
+
+    def shutdown(self):
+        self.flush()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+PLAYTIME_WRITER = PlaytimeWriter()
+
+
+def _touch(model, field: str, when, **lookup):
+    # get_or_create() saves every field when it creates a row, so the value is written with a
+    # separate update() which can't overwrite total_playtime with a stale number.
+    model.objects.get_or_create(**lookup)
+    model.objects.filter(**lookup).update(**{field: when})
+
+
+def write_character_timestamp(character_id: int, account_id: int, field: str, when):
+    from athanor.playtime.models import CharacterPlaytime, CharacterAccountPlaytime
+
+    _touch(CharacterPlaytime, field, when, id=character_id)
+    _touch(
+        CharacterAccountPlaytime,
+        field,
+        when,
+        playtime_id=character_id,
+        account_id=account_id,
+    )
+
+
+def write_account_timestamp(account_id: int, field: str, when):
+    from athanor.playtime.models import AccountPlaytime
+
+    _touch(AccountPlaytime, field, when, id=account_id)
+
+
+def record_character(character, account, field: str, when):
+    """
+    Queue setting last_login or last_logout for a character, both overall and for this account.
+    """
+    PLAYTIME_WRITER.submit(
+        ("character", character.id),
+        write_character_timestamp,
+        character.id,
+        account.id,
+        field,
+        when,
+    )
+
+
+def record_account(account, field: str, when):
+    """
+    Queue setting last_login or last_logout for an account.
+    """
+    PLAYTIME_WRITER.submit(
+        ("account", account.id), write_account_timestamp, account.id, field, when
+    )
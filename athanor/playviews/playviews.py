@@ -1,14 +1,38 @@
+import typing
 from athanor.playviews.models import PlayviewDB
 from athanor.playviews.managers import PlayviewManager
 
 from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
 from django.utils.translation import gettext as _
 from evennia.typeclasses.models import TypeclassBase
 from evennia.utils.utils import lazy_property
 from evennia.objects.objects import ObjectSessionHandler
 from evennia.server import signals
+import athanor
 from athanor.typeclasses.mixin import AthanorAccess
 from athanor.utils import utcnow
+from athanor.playtime.writer import PLAYTIME_WRITER, record_character
+from athanor.journal.journal import JOURNAL
+
+
+def reset_playview_cache(*objs, relations: bool = False):
+    """
+    Make objects look up their playview again, after one was created, deleted or re-pointed.
+
+    Args:
+        *objs (ObjectDB): The objects. None is ignored.
+        relations (bool): Also drop Django's cached reverse relations. Needed when a playview
+            was deleted or moved away, as those would otherwise keep pointing at it.
+    """
+    for obj in objs:
+        if obj is None:
+            continue
+        if relations:
+            obj._state.fields_cache.pop("playview", None)
+            obj._state.fields_cache.pop("puppeting_playview", None)
+        if invalidate := getattr(obj.sessions, "invalidate", None):
+            invalidate()
 
 
 class DefaultPlayview(AthanorAccess, PlayviewDB, metaclass=TypeclassBase):
@@ -47,9 +71,87 @@ class DefaultPlayview(AthanorAccess, PlayviewDB, metaclass=TypeclassBase):
     def at_add_session(self, session, **kwargs):
         pass
 
-    def rejoin_session(self, session, **kwargs):
+    def rejoin_session(self, session, unsaved: typing.Optional[list] = None, **kwargs):
+        """
+        Reattach a session after a reload.
+
+        Args:
+            session (ServerSession): The session.
+            unsaved (list, optional): If given, a character whose account needs correcting is
+                only corrected in memory and appended to this list, for the caller to save in
+                bulk.
+        """
         self.sessions.add(session)
-        self.id.account = self.account
+        if self.id.db_account_id == self.account_id:
+            return
+        if unsaved is None:
+            self.id.account = self.account
+        else:
+            self.id.db_account_id = self.account_id
+            unsaved.append(self.id)
+
+    def can_switch_puppet(self, obj, **kwargs) -> bool:
+        return obj.access(self.account, "puppet")
+
+    def switch_puppet(self, obj, **kwargs):
+        """
+        Control a different object, such as a vehicle, while the character stays online. Call it
+        again with the character to switch back.
+
+        Sessions stay attached to the playview throughout, so there are no puppet or unpuppet
+        signals and no look. Commands follow session.puppet, so the new object's cmdset replaces
+        the old one for every session at once; the session and account cmdsets are untouched.
+
+        Args:
+            obj (ObjectDB): The object to control.
+
+        Raises:
+            RuntimeError: If the switch is not possible. The message gives the reason.
+        """
+        if not obj:
+            raise RuntimeError("Object not found")
+        if (old := self.db_puppet) == obj:
+            return
+        try:
+            current = obj.puppeting_playview
+        except ObjectDoesNotExist:
+            current = None
+        if current is not None and current != self:
+            raise RuntimeError(f"{obj.key} is already being controlled.")
+        if not self.can_switch_puppet(obj, **kwargs):
+            raise RuntimeError(f"You don't have permission to control '{obj.key}'.")
+
+        self.at_pre_switch_puppet(obj, **kwargs)
+        self.db_puppet = obj
+        try:
+            self.save(update_fields=["db_puppet"])
+        except Exception as err:
+            self.db_puppet = old
+            raise RuntimeError(f"Could not switch to '{obj.key}'.") from err
+
+        # Django leaves the old puppet's reverse relation pointing at this playview.
+        old._state.fields_cache.pop("puppeting_playview", None)
+        reset_playview_cache(old, obj)
+        if old != self.id and old.db_account_id == self.account_id:
+            old.account = None
+        if obj.db_account_id != self.account_id:
+            obj.account = self.account
+        obj.locks.cache_lock_bypass(obj)
+
+        self.at_post_switch_puppet(old, **kwargs)
+        athanor.emit("playview_switch_puppet", sender=self, old=old, new=obj, **kwargs)
+
+    def at_pre_switch_puppet(self, obj, **kwargs):
+        """
+        Called by switch_puppet() just before control moves to obj. Raise RuntimeError to stop it.
+        """
+        pass
+
+    def at_post_switch_puppet(self, old, **kwargs):
+        """
+        Called by switch_puppet() once control has moved away from old.
+        """
+        pass
 
     def at_init_playview(self, session, **kwargs):
         self.id.at_pre_puppet(self, session=session)
@@ -98,13 +200,7 @@ class DefaultPlayview(AthanorAccess, PlayviewDB, metaclass=TypeclassBase):
     def record_login(self, current_time=None, **kwargs):
         if current_time is None:
             current_time = utcnow()
-        p = self.id.playtime
-        p.last_login = current_time
-        p.save(update_fields=["last_login"])
-
-        ca = p.per_account.get_or_create(account=self.account)[0]
-        ca.last_login = current_time
-        ca.save(update_fields=["last_login"])
+        record_character(self.id, self.account, "last_login", current_time)
 
     def announce_join_game(self):
         """
@@ -124,6 +220,7 @@ class DefaultPlayview(AthanorAccess, PlayviewDB, metaclass=TypeclassBase):
             id=character, account=account, db_puppet=character, db_key=character.key
         )
         obj.save()
+        reset_playview_cache(character)
         return obj
 
     def execute_look(self, **kwargs):
@@ -169,13 +266,7 @@ class DefaultPlayview(AthanorAccess, PlayviewDB, metaclass=TypeclassBase):
     def record_logout(self, current_time=None, **kwargs):
         if current_time is None:
             current_time = utcnow()
-        p = self.id.playtime
-        p.last_logout = current_time
-        p.save(update_fields=["last_logout"])
-
-        ca = p.per_account.get_or_create(account=self.account)[0]
-        ca.last_logout = current_time
-        ca.save(update_fields=["last_logout"])
+        record_character(self.id, self.account, "last_logout", current_time)
 
     def stow(self, **kwargs):
         if not settings.OFFLINE_CHARACTERS_VOID_STORAGE:
@@ -192,12 +283,192 @@ class DefaultPlayview(AthanorAccess, PlayviewDB, metaclass=TypeclassBase):
     def at_cold_start(self, **kwargs):
         """
         Called by Athanor when the game starts up cold. This needs to clean up the playview.
+
+        To clean up every playview at once, use DefaultPlayview.cleanup_all() instead.
         """
         self.cleanup(current_time=None, **kwargs)
 
     def at_cold_stop(self, **kwargs):
         self.cleanup(current_time=None, **kwargs)
 
+    @classmethod
+    def cleanup_all(cls, queryset=None, current_time=None, **kwargs):
+        """
+        Clean up many playviews at once, such as every playview left over from a crash.
+
+        This does what cleanup() does for each playview, but with a handful of queries for the
+        whole batch instead of several per playview. Playview typeclasses can add their own batched
+        cleanup by overloading at_batch_cleanup(); the per-playview cleanup() is NOT called.
+
+        Args:
+            queryset (QuerySet, optional): The playviews to clean up. Defaults to all of them,
+                whatever their typeclass.
+            current_time (datetime, optional): The logout time to record. Defaults to now.
+
+        Returns:
+            int: The number of playviews cleaned up.
+        """
+        if current_time is None:
+            current_time = utcnow()
+        if queryset is None:
+            # cls.objects.all() would only find playviews of exactly this typeclass.
+            queryset = PlayviewDB.objects.all()
+        playviews = list(queryset.select_related("id", "account", "db_puppet"))
+        if not playviews:
+            return 0
+
+        by_class = dict()
+        for playview in playviews:
+            by_class.setdefault(type(playview), list()).append(playview)
+        for playview_class, batch in by_class.items():
+            playview_class.at_batch_cleanup(batch, current_time=current_time, **kwargs)
+
+        for playview in playviews:
+            for sess in playview.sessions.all():
+                playview.remove_session(sess, logout_type="cleanup", **kwargs)
+
+        characters = [playview.id for playview in playviews]
+        cls._bulk_stow(characters)
+        cls._bulk_record_logout(
+            [(playview.id.id, playview.account_id) for playview in playviews],
+            current_time,
+        )
+        cls._bulk_remove_tag(characters, "puppeted", "account")
+        cls._bulk_release_puppets(playviews)
+        for character in characters:
+            JOURNAL.forget(character)
+
+        PlayviewDB.objects.filter(id__in=[c.id for c in characters]).delete()
+        for playview in playviews:
+            reset_playview_cache(playview.id, playview.db_puppet, relations=True)
+        return len(playviews)
+
+    @classmethod
+    def at_batch_cleanup(cls, playviews: list, current_time=None, **kwargs):
+        """
+        Called by cleanup_all() with every playview of this typeclass, before anything is cleaned
+        up. Overload this for custom cleanup, preferably with bulk queries.
+        """
+        pass
+
+    @staticmethod
+    def _bulk_stow(characters: list):
+        from django.db import connection
+        from evennia.objects.models import ObjectDB
+        from evennia.typeclasses.attributes import Attribute
+        from evennia.utils.dbserialize import to_pickle
+
+        if not settings.OFFLINE_CHARACTERS_VOID_STORAGE:
+            return
+        if not (stowed := [c for c in characters if c.location]):
+            return
+
+        locations = {c.id: c.location for c in stowed}
+        through = ObjectDB.db_attributes.through
+        existing = {
+            row.objectdb_id: row.attribute
+            for row in through.objects.filter(
+                objectdb_id__in=locations.keys(),
+                attribute__db_key="prelogout_location",
+                attribute__db_category__isnull=True,
+                attribute__db_attrtype__isnull=True,
+            ).select_related("attribute")
+        }
+        for obj_id, attr in existing.items():
+            attr.db_value = to_pickle(locations[obj_id])
+        Attribute.objects.bulk_update(existing.values(), ["db_value"])
+
+        missing = [obj_id for obj_id in locations if obj_id not in existing]
+        attrs = [
+            Attribute(
+                db_key="prelogout_location",
+                db_model="objectdb",
+                db_value=to_pickle(locations[obj_id]),
+            )
+            for obj_id in missing
+        ]
+        if connection.features.can_return_rows_from_bulk_insert:
+            created = Attribute.objects.bulk_create(attrs)
+        else:
+            # MySQL/MariaDB don't hand back the new primary keys, which the through rows need.
+            for attr in attrs:
+                attr.save()
+            created = attrs
+        through.objects.bulk_create(
+            [
+                through(objectdb_id=obj_id, attribute_id=attr.id)
+                for obj_id, attr in zip(missing, created)
+            ]
+        )
+
+        ObjectDB.objects.filter(id__in=locations.keys()).update(db_location=None)
+        for character in stowed:
+            location = character.location
+            character.attributes.reset_cache()
+            location.at_object_leave(character, None, stowed=True)
+            location.contents_cache.remove(character)
+            character.db_location = None
+
+    @staticmethod
+    def _bulk_record_logout(pairs: list[tuple[int, int]], current_time):
+        from django.db.models import Q
+        from athanor.playtime.models import CharacterPlaytime, CharacterAccountPlaytime
+
+        # anything still queued for these characters must land before the logout time.
+        PLAYTIME_WRITER.flush()
+        character_ids = [character_id for character_id, _account_id in pairs]
+        CharacterPlaytime.objects.bulk_create(
+            [CharacterPlaytime(id_id=character_id) for character_id in character_ids],
+            ignore_conflicts=True,
+        )
+        CharacterPlaytime.objects.filter(id__in=character_ids).update(
+            last_logout=current_time
+        )
+        CharacterAccountPlaytime.objects.bulk_create(
+            [
+                CharacterAccountPlaytime(playtime_id=character_id, account_id=account_id)
+                for character_id, account_id in pairs
+            ],
+            ignore_conflicts=True,
+        )
+        for i in range(0, len(pairs), 500):
+            match = Q()
+            for character_id, account_id in pairs[i : i + 500]:
+                match |= Q(playtime_id=character_id, account_id=account_id)
+            CharacterAccountPlaytime.objects.filter(match).update(
+                last_logout=current_time
+            )
+
+    @staticmethod
+    def _bulk_release_puppets(playviews: list):
+        from evennia.objects.models import ObjectDB
+
+        # objects controlled through switch_puppet() are let go of, as in cleanup().
+        if not (
+            puppets := [
+                pv.db_puppet
+                for pv in playviews
+                if pv.db_puppet_id != pv.pk and pv.db_puppet.db_account_id == pv.account_id
+            ]
+        ):
+            return
+        ObjectDB.objects.filter(id__in=[p.id for p in puppets]).update(db_account=None)
+        for puppet in puppets:
+            puppet.db_account = None
+
+    @staticmethod
+    def _bulk_remove_tag(characters: list, key: str, category: str):
+        from evennia.objects.models import ObjectDB
+
+        ObjectDB.db_tags.through.objects.filter(
+            objectdb_id__in=[c.id for c in characters],
+            tag__db_key=key,
+            tag__db_category=category,
+            tag__db_tagtype__isnull=True,
+        ).delete()
+        for character in characters:
+            character.tags.reset_cache()
+
     def cleanup(self, current_time=None, **kwargs):
         self.stow(**kwargs)
 
@@ -206,7 +477,12 @@ class DefaultPlayview(AthanorAccess, PlayviewDB, metaclass=TypeclassBase):
 
         self.record_logout(current_time=current_time, **kwargs)
         self.id.tags.remove("puppeted", category="account")
+        JOURNAL.forget(self.id)
+        character, puppet = self.id, self.db_puppet
+        if puppet != character and puppet.db_account_id == self.account_id:
+            puppet.account = None
         self.delete()
+        reset_playview_cache(character, puppet, relations=True)
 
     def remove_session(self, session, logout_type="disconnect", **kwargs):
         self.sessions.remove(session)
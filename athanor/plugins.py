@@ -0,0 +1,394 @@
+"""
+Plugin loading support for athanor.init() and athanor.finalize().
+
+This module is imported while settings.py is still being composed, so it must not touch Django
+settings or models at import time.
+"""
+import datetime
+import decimal
+import enum
+import hashlib
+import heapq
+import pathlib
+import pickle
+import re
+import sys
+import time
+import tracemalloc
+import types
+import typing
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, Future
+from importlib import import_module
+
+PHASES = ("import", "init", "post_init", "finalize")
+
+
+class PluginStats:
+    """
+    Wall time (seconds) and traced memory delta (bytes) for each startup phase of one plugin.
+    """
+
+    __slots__ = ("name", "timings", "memory")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.timings: dict[str, float] = dict()
+        self.memory: dict[str, int] = dict()
+
+    @property
+    def total_time(self) -> float:
+        return sum(self.timings.values())
+
+    @property
+    def total_memory(self) -> typing.Optional[int]:
+        if not self.memory:
+            return None
+        return sum(self.memory.values())
+
+
+class StartupProfiler:
+    """
+    Records how long each plugin takes to import, init, post_init and finalize.
+
+    Memory deltas are only recorded while tracemalloc is tracing, which athanor.init() will turn on
+    when called with profile_memory=True.
+    """
+
+    def __init__(self):
+        self.plugins: dict[str, PluginStats] = dict()
+        self.preloaded: dict[str, float] = dict()
+        self.preload_errors: dict[str, str] = dict()
+        self._preload_futures: list[Future] = list()
+        self._executor: typing.Optional[ThreadPoolExecutor] = None
+
+    @contextmanager
+    def measure(self, plugin: str, phase: str):
+        stats = self.plugins.get(plugin, None)
+        if stats is None:
+            stats = self.plugins[plugin] = PluginStats(plugin)
+        tracing = tracemalloc.is_tracing()
+        mem_start = tracemalloc.get_traced_memory()[0] if tracing else 0
+        start = time.perf_counter()
+        try:
+            yield stats
+        finally:
+            stats.timings[phase] = time.perf_counter() - start
+            if tracing and tracemalloc.is_tracing():
+                stats.memory[phase] = tracemalloc.get_traced_memory()[0] - mem_start
+
+    def _preload_one(self, path: str):
+        start = time.perf_counter()
+        try:
+            import_module(path)
+        except Exception as err:
+            # the real import later on will raise this properly.
+            self.preload_errors[path] = str(err)
+            return
+        self.preloaded[path] = time.perf_counter() - start
+
+    def preload(self, modules: typing.Iterable[str], max_workers: int = 4):
+        """
+        Imports modules in a background thread pool. Returns immediately.
+        """
+        if not (modules := [m for m in dict.fromkeys(modules) if m]):
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="athanor-preload"
+            )
+        for path in modules:
+            self._preload_futures.append(self._executor.submit(self._preload_one, path))
+
+    def wait_for_preload(self, timeout: typing.Optional[float] = None):
+        """
+        Block until every preload started so far has finished.
+        """
+        futures, self._preload_futures = self._preload_futures, list()
+        for future in futures:
+            future.result(timeout=timeout)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def report(self) -> str:
+        """
+        A plain-text table of plugins, slowest first.
+        """
+        lines = [
+            f"{'Plugin':<30} "
+            + " ".join(f"{phase:>10}" for phase in PHASES)
+            + f" {'Total':>10} {'Memory':>12}"
+        ]
+        for stats in sorted(
+            self.plugins.values(), key=lambda s: s.total_time, reverse=True
+        ):
+            timings = " ".join(
+                f"{stats.timings[phase] * 1000:>8.1f}ms"
+                if phase in stats.timings
+                else f"{'-':>10}"
+                for phase in PHASES
+            )
+            memory = stats.total_memory
+            memory = f"{memory / 1024:>10.1f}KB" if memory is not None else f"{'-':>12}"
+            lines.append(
+                f"{stats.name:<30} {timings} {stats.total_time * 1000:>8.1f}ms {memory}"
+            )
+        if self.preloaded:
+            lines.append("")
+            lines.append(f"Preloaded {len(self.preloaded)} modules in the background:")
+            for path, elapsed in sorted(
+                self.preloaded.items(), key=lambda i: i[1], reverse=True
+            ):
+                lines.append(f"  {path:<60} {elapsed * 1000:>8.1f}ms")
+        for path, error in self.preload_errors.items():
+            lines.append(f"  {path:<60} FAILED: {error}")
+        return "\n".join(lines)
+
+
+PROFILER = StartupProfiler()
+
+
+def _module_of(path: str) -> str:
+    return path.rsplit(".", 1)[0] if "." in path else path
+
+
+def collect_preload_modules(settings, plugins: dict) -> list[str]:
+    """
+    Gathers the modules that plugins declared through settings: CMD_MODULES_*, ATHANOR_HANDLERS,
+    the *_ACCESS_FUNCTIONS and *_DEFAULT_LOCKS paths, plus any plugin-level PRELOAD_MODULES list.
+    """
+    out = list()
+
+    for name in dir(settings):
+        if name.startswith("CMD_MODULES_"):
+            out.extend(getattr(settings, name))
+
+    for handlers in getattr(settings, "ATHANOR_HANDLERS", dict()).values():
+        out.extend(_module_of(path) for path in handlers.values() if isinstance(path, str))
+
+    for t in getattr(settings, "ACCESS_FUNCTIONS_LIST", list()):
+        for func_list in getattr(settings, f"{t}_ACCESS_FUNCTIONS", dict()).values():
+            out.extend(_module_of(path) for path in func_list if isinstance(path, str))
+
+    for t in getattr(settings, "DEFAULT_LOCKS_LIST", list()):
+        for func_list in getattr(settings, f"{t}_DEFAULT_LOCKS", dict()).values():
+            out.extend(
+                _module_of(path)
+                for path in func_list
+                if isinstance(path, str) and "(" not in path
+            )
+
+    for module in plugins.values():
+        out.extend(getattr(module, "PRELOAD_MODULES", list()))
+
+    return out
+
+
+class PluginDependencyError(ValueError):
+    pass
+
+
+def sort_plugins(modules: dict[str, types.ModuleType]) -> list[str]:
+    """
+    Orders plugins so that each comes after everything it depends on.
+
+    A plugin may declare module-level `depends_on` (names of plugins or of capabilities) and
+    `provides` (capability names). Plugins without dependencies between them keep the order they
+    were listed in.
+
+    Raises:
+        PluginDependencyError: On a missing dependency or a cycle.
+    """
+    providers: dict[str, list[str]] = {name: [name] for name in modules}
+    for name, module in modules.items():
+        for capability in getattr(module, "provides", ()):
+            providers.setdefault(capability, list()).append(name)
+
+    order = {name: i for i, name in enumerate(modules)}
+    dependents: dict[str, set[str]] = {name: set() for name in modules}
+    pending: dict[str, int] = dict()
+    for name, module in modules.items():
+        requires = set()
+        for dependency in getattr(module, "depends_on", ()):
+            if dependency == "athanor":
+                continue
+            if dependency not in providers:
+                raise PluginDependencyError(
+                    f"Plugin '{name}' depends on '{dependency}', which no plugin provides."
+                )
+            requires.update(p for p in providers[dependency] if p != name)
+        pending[name] = len(requires)
+        for required in requires:
+            dependents[required].add(name)
+
+    ready = [(order[name], name) for name, count in pending.items() if not count]
+    heapq.heapify(ready)
+    out = list()
+    while ready:
+        _i, name = heapq.heappop(ready)
+        out.append(name)
+        for dependent in dependents[name]:
+            pending[dependent] -= 1
+            if not pending[dependent]:
+                heapq.heappush(ready, (order[dependent], dependent))
+
+    if len(out) != len(modules):
+        stuck = ", ".join(name for name in modules if pending[name])
+        raise PluginDependencyError(f"Plugin dependency cycle between: {stuck}")
+    return out
+
+
+class _Uncacheable(Exception):
+    pass
+
+
+def _stable_repr(value) -> str:
+    """
+    A representation of a settings value that is identical across processes, so it can be hashed.
+    Sets and dicts are sorted because string hashing is randomized per process.
+    """
+    if value is None or isinstance(
+        value,
+        (
+            str,
+            bytes,
+            int,
+            float,
+            pathlib.PurePath,
+            datetime.date,
+            datetime.time,
+            datetime.timedelta,
+            decimal.Decimal,
+            enum.Enum,
+        ),
+    ):
+        return repr(value)
+    if isinstance(value, dict):
+        items = sorted(f"{_stable_repr(k)}:{_stable_repr(v)}" for k, v in value.items())
+        return "{" + ",".join(items) + "}"
+    if isinstance(value, (set, frozenset)):
+        return "set(" + ",".join(sorted(_stable_repr(v) for v in value)) + ")"
+    if isinstance(value, (list, tuple)):
+        return "[" + ",".join(_stable_repr(v) for v in value) + "]"
+    if isinstance(value, re.Pattern):
+        return f"re({value.pattern!r},{value.flags})"
+    if isinstance(value, (type, types.FunctionType, types.BuiltinFunctionType)):
+        return f"<{value.__module__}.{value.__qualname__}>"
+    if isinstance(value, types.ModuleType):
+        return f"<module {value.__name__}>"
+    raise _Uncacheable(type(value).__name__)
+
+
+def _settings_state(settings) -> dict[str, str]:
+    return {
+        name: _stable_repr(getattr(settings, name))
+        for name in dir(settings)
+        if name.isupper()
+    }
+
+
+def _file_signature(path: pathlib.Path) -> str:
+    stat = path.stat()
+    return f"{path}:{stat.st_mtime_ns}:{stat.st_size}"
+
+
+# directories under a package which never hold anything settings composition reads.
+_UNSIGNED_DIRS = {"__pycache__", "logs"}
+
+
+def _tree_signature(module: types.ModuleType, skip: typing.Iterable[pathlib.Path] = ()) -> str:
+    """
+    Signs every Python file of the package a module belongs to, so that an edit anywhere in a
+    plugin invalidates the cache, not just an edit to its top-level module. Data files are only
+    signed if the module lists them in SETTINGS_DATA_FILES (paths relative to the module's
+    directory). Files and directories in skip, and any __pycache__ or logs directory, are left
+    out.
+    """
+    signatures = list()
+    for name in getattr(module, "SETTINGS_DATA_FILES", ()):
+        path = pathlib.Path(module.__file__).parent / name
+        signatures.append(_file_signature(path) if path.is_file() else f"{path}:missing")
+
+    package = sys.modules.get(module.__name__.split(".")[0], module)
+    if not (roots := list(getattr(package, "__path__", ()))):
+        if not (path := getattr(package, "__file__", None)):
+            return "\n".join([package.__name__, *signatures])
+        return "\n".join([_file_signature(pathlib.Path(path)), *signatures])
+
+    skip = {pathlib.Path(p).resolve() for p in skip}
+    signatures.insert(0, package.__name__)
+    for root in roots:
+        for path in sorted(pathlib.Path(root).rglob("*.py")):
+            resolved = path.resolve()
+            if _UNSIGNED_DIRS.intersection(path.relative_to(root).parts) or resolved in skip:
+                continue
+            if any(p in skip for p in resolved.parents):
+                continue
+            signatures.append(_file_signature(path))
+    return "\n".join(signatures)
+
+
+def settings_fingerprint(
+    state: dict[str, str], plugins: list[types.ModuleType], skip: typing.Iterable = ()
+) -> str:
+    """
+    Hashes everything that goes into settings composition: the settings state (from
+    _settings_state()) before any plugin init runs, and the Python files (plus declared
+    SETTINGS_DATA_FILES) of athanor and of each plugin's package, in load order. Paths in skip,
+    such as the cache files, are not signed.
+    """
+    import athanor
+
+    skip = list(skip)
+    digest = hashlib.sha256()
+    for name, value in sorted(state.items()):
+        digest.update(f"{name}={value}\n".encode())
+    digest.update(_tree_signature(athanor, skip).encode())
+    for module in plugins:
+        digest.update(_tree_signature(module, skip).encode())
+    return digest.hexdigest()
+
+
+class SettingsCache:
+    """
+    Stores the settings a full composition changed, keyed by the fingerprint of its inputs, so the
+    next start with identical inputs can apply them without running any plugin init/post_init.
+
+    It is only used if every plugin opts in with `SETTINGS_CACHEABLE = True`, promising that its
+    init/post_init only change settings and depend on nothing outside the settings and its own
+    package (no environment variables, no files elsewhere). Data files the init reads must be
+    listed in the plugin's SETTINGS_DATA_FILES, as only Python files are signed otherwise.
+    """
+
+    def __init__(self, path):
+        self.path = pathlib.Path(path)
+
+    def load(self, fingerprint: str) -> typing.Optional[dict]:
+        try:
+            with self.path.open("rb") as f:
+                cached_fingerprint, values = pickle.load(f)
+        except Exception:
+            return None
+        if cached_fingerprint != fingerprint:
+            return None
+        return values
+
+    def save(self, fingerprint: str, settings, before: dict[str, str]):
+        try:
+            after = _settings_state(settings)
+        except _Uncacheable:
+            return
+        values = {
+            name: getattr(settings, name)
+            for name, state in after.items()
+            if before.get(name, None) != state
+        }
+        try:
+            data = pickle.dumps((fingerprint, values))
+        except Exception:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp = self.path.with_suffix(self.path.suffix + ".tmp")
+        temp.write_bytes(data)
+        temp.replace(self.path)
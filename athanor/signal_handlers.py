@@ -54,7 +54,11 @@ def login_fail(sender, **kwargs):
 
 
 def _login_record(user, ip, success=True, reason=None):
-    from athanor.playviews.models import Host
+    from athanor.login.models import Host
+    from athanor.login.resolver import queue_hostname
 
     host, created = Host.objects.get_or_create(ip=ip)
     host.records.create(account=user, is_success=success, reason=reason)
+    if created or not host.hostname:
+        # known hosts keep their hostname; only new or unresolved ones are looked up.
+        queue_hostname(host.ip)
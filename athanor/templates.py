@@ -0,0 +1,102 @@
+"""
+Precompiled display templates.
+
+Appearance and compass templates are plain format strings declared on typeclasses. Rather than
+re-parsing them through str.format_map() on every look, they are split once into literal and field
+segments and rendered with a list join.
+"""
+import string
+import typing
+from functools import lru_cache
+
+from evennia.utils.ansi import strip_ansi
+
+_FORMATTER = string.Formatter()
+
+_CONVERSIONS = {"s": str, "r": repr, "a": ascii}
+
+
+class CompiledTemplate:
+    """
+    A format string pre-split into (literal, field, format_spec, conversion) segments.
+
+    Missing fields behave like athanor.utils.SafeDict: they render as "{field}" unless a
+    default is given.
+    """
+
+    __slots__ = ("template", "segments", "fields", "_fallback")
+
+    def __init__(self, template: str):
+        self.template = template
+        self.segments = list()
+        self.fields = list()
+        self._fallback = False
+
+        for literal, field, spec, conversion in _FORMATTER.parse(template):
+            if field is not None and (
+                not field or "." in field or "[" in field or (spec and "{" in spec)
+            ):
+                # positional, attribute/index lookups and nested specs are left to str.format_map.
+                self._fallback = True
+            self.segments.append((literal, field, spec or "", conversion))
+            if field:
+                self.fields.append(field)
+
+    def render(self, mapping: typing.Mapping, default: typing.Optional[str] = None) -> str:
+        """
+        Render the template against mapping.
+
+        Args:
+            mapping (Mapping): Field values. Any Mapping works, including SafeDict and defaultdict.
+            default (str, optional): Value used for missing fields. If None, missing fields are left
+                as "{field}".
+
+        Returns:
+            str: The rendered text.
+        """
+        if self._fallback:
+            return self.template.format_map(mapping)
+
+        out = list()
+        for literal, field, spec, conversion in self.segments:
+            if literal:
+                out.append(literal)
+            if field is None:
+                continue
+            try:
+                value = mapping[field]
+            except KeyError:
+                value = "{" + field + "}" if default is None else default
+            if conversion:
+                value = _CONVERSIONS[conversion](value)
+            out.append(format(value, spec))
+        return "".join(out)
+
+    def __repr__(self):
+        return f"<CompiledTemplate {self.template!r}>"
+
+
+@lru_cache(maxsize=None)
+def compile_template(template: str) -> CompiledTemplate:
+    """
+    Returns the CompiledTemplate for a template string. Templates are class attributes, so this cache
+    stays small and each distinct template is only parsed once per process.
+    """
+    return CompiledTemplate(template)
+
+
+@lru_cache(maxsize=4096)
+def ansi_len(text: str) -> int:
+    """
+    The visible width of a string containing Evennia ANSI markup.
+
+    Equivalent to len(ANSIString(text)) without building an ANSIString.
+    """
+    return len(strip_ansi(text))
+
+
+def ansi_ljust(text: str, width: int) -> str:
+    """
+    Pads text with spaces on the right until it is width visible characters wide.
+    """
+    return text + " " * (width - ansi_len(text))
@@ -9,6 +9,8 @@ from evennia.utils.evtable import EvTable
 
 import athanor
 from athanor.utils import utcnow
+from athanor.playtime.writer import record_account
+from athanor.playtime.history import PLAYTIME_HISTORY
 from .mixin import AthanorLowBase, AthanorHandler
 
 
@@ -256,9 +258,7 @@ class AthanorAccount(AthanorHandler, AthanorLowBase, DefaultAccount):
         """
         Modified to track login time.
         """
-        p = self.playtime
-        p.last_login = utcnow()
-        p.save(update_fields=["last_login"])
+        record_account(self, "last_login", utcnow())
         super().at_post_login(session=session, **kwargs)
 
     def at_post_disconnect(self):
@@ -266,12 +266,11 @@ class AthanorAccount(AthanorHandler, AthanorLowBase, DefaultAccount):
         Modified to track logout time.
         """
         if not self.is_connected:
-            p = self.playtime
-            p.last_logout = utcnow()
-            p.save(update_fields=["last_logout"])
+            record_account(self, "last_logout", utcnow())
         super().at_post_disconnect()
 
     def increment_playtime(self, value, characters):
+        PLAYTIME_HISTORY.add(self, characters, value)
         p = self.playtime
         p.total_playtime += value
         p.save(update_fields=["total_playtime"])
@@ -3,6 +3,7 @@ from django.conf import settings
 from evennia.objects.objects import DefaultCharacter, DefaultObject
 import athanor
 from athanor.utils import utcnow
+from athanor.journal.journal import JOURNAL, message_text
 from .mixin import AthanorObject
 
 
@@ -32,3 +33,12 @@ class AthanorCharacter(AthanorObject, DefaultCharacter):
         """
         This explicitly does nothing, because the Playview system handles it.
         """
+
+    def at_post_msg_receive(self, from_obj=None, **kwargs):
+        # only characters somebody is playing are journalled; an NPC's buffer would never be
+        # forgotten, and nobody reads it.
+        if settings.MESSAGE_JOURNAL_ENABLED and self.sessions.playview is not None:
+            text, kind = message_text(kwargs)
+            if text:
+                JOURNAL.record(self, text, kind)
+        super().at_post_msg_receive(from_obj=from_obj, **kwargs)
@@ -1,7 +1,37 @@
+import typing
 from evennia.objects.objects import DefaultExit
 import athanor
+from athanor.grid.directions import ExitDir, exit_direction
 from .mixin import AthanorObject
 
 
 class AthanorExit(AthanorObject, DefaultExit):
     lock_default_funcs = athanor.OBJECT_EXIT_DEFAULT_LOCKS
+
+    @property
+    def direction(self) -> typing.Optional[ExitDir]:
+        return exit_direction(self)
+
+    @direction.setter
+    def direction(self, value):
+        if value is None:
+            self.attributes.remove("direction")
+        elif (direction := ExitDir.from_string(value)) is None:
+            raise ValueError(f"Unknown exit direction: {value}")
+        else:
+            self.db.direction = direction.value
+        self._refresh_exit_index()
+
+    def _refresh_exit_index(self):
+        if index := getattr(self.location, "exit_index", None):
+            index.add(self)
+
+    def basetype_posthook_setup(self):
+        super().basetype_posthook_setup()
+        # freshly created exits don't pass through at_object_receive.
+        self._refresh_exit_index()
+
+    def at_object_delete(self):
+        if index := getattr(self.location, "exit_index", None):
+            index.remove(self)
+        return super().at_object_delete()
@@ -2,6 +2,7 @@ import typing
 from collections import defaultdict
 
 from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
 
 from evennia.utils import logger, lazy_property, make_iter, to_str
 from evennia.utils.ansi import strip_ansi, ANSIString
@@ -9,25 +10,55 @@ from evennia.objects.objects import _MSG_CONTENTS_PARSER
 
 import athanor
 from athanor.utils import SafeDict
+from athanor.templates import compile_template
 from athanor.lockhandler import AthanorLockHandler
 
 
+_NO_PLAYVIEW = object()
+
+
 class PlayviewSessionHandler:
     """
     A dummy handler for Objects which relays session-related commands to the Playview.
 
+    The playview is looked up once and remembered, including when there isn't one, so objects
+    which are never puppeted don't hit the missing reverse relations on every call. Anything which
+    creates, deletes or re-points a playview must call invalidate() on the objects involved.
     """
 
+    __slots__ = ("obj", "_cached")
+
     def __init__(self, obj):
         self.obj = obj
+        self._cached = None
+
+    def _resolve(self):
+        for relation in ("puppeting_playview", "playview"):
+            try:
+                if pv := getattr(self.obj, relation):
+                    return pv
+            except ObjectDoesNotExist:
+                pass
+        return None
 
     @property
     def _playview(self):
-        if pv := getattr(
-            self.obj, "puppeting_playview", getattr(self.obj, "playview", None)
-        ):
-            return pv
-        return None
+        if (pv := self._cached) is None:
+            pv = self._cached = self._resolve() or _NO_PLAYVIEW
+        return None if pv is _NO_PLAYVIEW else pv
+
+    @property
+    def playview(self):
+        """
+        The playview this object's sessions belong to, or None if nobody is playing it.
+        """
+        return self._playview
+
+    def invalidate(self):
+        """
+        Forget the remembered playview, so the next call looks it up again.
+        """
+        self._cached = None
 
     def get(self, sessid=None):
         if not (pv := self._playview):
@@ -273,7 +304,7 @@ class AthanorBase(AthanorLowBase):
         if not looker:
             return ""
         kwargs["contents_map"] = self.filter_visible(looker, **kwargs)
-        out_dict = SafeDict()
+        out_dict = dict()
         for k in self.format_kwargs:
             if f_func := getattr(self, f"get_display_{k}", None):
                 if callable(f_func):
@@ -281,7 +312,9 @@ class AthanorBase(AthanorLowBase):
                 else:
                     out_dict[k] = f_func
         return self.format_appearance(
-            self.appearance_template.format_map(out_dict), looker, **kwargs
+            compile_template(self.appearance_template).render(out_dict),
+            looker,
+            **kwargs,
         )
 
     def can_hear(self, target):
@@ -3,11 +3,14 @@ from collections import defaultdict
 from django.conf import settings
 
 from evennia.utils import evtable, lazy_property
-from evennia.utils.ansi import ANSIString
 from evennia.objects.objects import DefaultRoom, DefaultObject
 
 
 import athanor
+from athanor.templates import compile_template, ansi_ljust
+from athanor.grid.directions import ExitDir, ExitIndex
+from athanor.grid.coordinates import COORDINATES
+from athanor.grid.pathfinding import EXIT_GRAPH
 from .mixin import AthanorObject
 
 
@@ -38,9 +41,62 @@ class AthanorRoom(AthanorObject, DefaultRoom):
         """
         self.location = None
 
-    def at_object_creation(self):
-        # typing.Dict[ExitDir, "AthanorExit"]
-        self.db.exit_grid = dict()
+    @lazy_property
+    def exit_index(self) -> ExitIndex:
+        return ExitIndex(self)
+
+    def get_exit(self, direction) -> typing.Optional["AthanorExit"]:
+        """
+        Retrieve the exit leading in direction, if any.
+
+        Args:
+            direction (ExitDir or str): The direction, such as ExitDir.NORTH, "north" or "n".
+        """
+        return self.exit_index.get(direction)
+
+    def get_visible_exits(self, looker) -> dict[ExitDir, "AthanorExit"]:
+        """
+        The subset of the exit index that looker can see, mirroring get_visible_contents().
+        """
+        return {
+            direction: ex
+            for direction, ex in self.exit_index.items()
+            if ex.access(looker, "view") and ex.access(looker, "search", default=True)
+        }
+
+    @property
+    def coordinates(self) -> typing.Optional[tuple[str, int, int, int]]:
+        """
+        This room's (zone, x, y, z) on the grid, or None if it isn't placed.
+        """
+        return COORDINATES.get(self)
+
+    def set_coordinates(self, x: int, y: int, z: int = 0, zone: str = ""):
+        COORDINATES.set(self, x, y, z, zone=zone)
+
+    def clear_coordinates(self):
+        COORDINATES.remove(self)
+
+    def get_rooms_in_radius(self, radius: int) -> dict[tuple[int, int, int], "AthanorRoom"]:
+        """
+        Returns every room within radius of this one, keyed by (x, y, z). Empty if this room has no
+        coordinates.
+        """
+        if not (coords := self.coordinates):
+            return dict()
+        return COORDINATES.radius(*coords, radius)
+
+    def find_path_to(self, destination, traverser=None, **kwargs) -> typing.Optional[list]:
+        """
+        The shortest list of exits leading from this room to destination, or None. If traverser is
+        given, only exits whose traverse lock it passes are used.
+        """
+        return EXIT_GRAPH.find_path(self, destination, traverser=traverser, **kwargs)
+
+    def at_object_delete(self):
+        # the table row cascades; just drop it from memory.
+        COORDINATES.remove(self, save=False)
+        return super().at_object_delete()
 
     def at_pre_move(self, destination: typing.Optional[DefaultObject], **kwargs):
         """
@@ -55,6 +111,7 @@ class AthanorRoom(AthanorObject, DefaultRoom):
         super().at_object_leave(
             moved_obj, target_location, move_type=move_type, **kwargs
         )
+        self.exit_index.remove(moved_obj)
 
     def at_object_receive(
         self,
@@ -69,54 +126,41 @@ class AthanorRoom(AthanorObject, DefaultRoom):
         Anything inside a Room is simply there.
         """
         del obj.db.coordinates
-        if "exit" in obj._content_types:
-            if obj.db.direction:
-                self.db.exit_grid[obj.db.direction] = obj
+        self.exit_index.add(obj)
 
     def generate_map_icon(self, looker):
         return "o"
 
     def generate_automap(self, looker, min_y=-2, max_y=2, min_x=-2, max_x=2):
-        visited = set()
-
         cur_map = defaultdict(lambda: defaultdict(lambda: " "))
 
+        if coords := self.coordinates:
+            zone, x, y, z = coords
+            for (room_x, room_y, _z), room in COORDINATES.box(
+                zone, x + min_x, x + max_x, y + min_y, y + max_y, z, z
+            ).items():
+                cur_map[room_y - y][room_x - x] = room.generate_map_icon(looker)
+            cur_map[0][0] = "|rX|n"
+            return cur_map
+
+        # No coordinates, so guess at positions by walking the exits.
+        visited = set()
+
         def scan(room, cur_x, cur_y):
             if room in visited:
                 return
             visited.add(room)
             cur_map[cur_y][cur_x] = room.generate_map_icon(looker)
 
-            con_map = room.get_visible_contents(looker)
-            for ex_obj in con_map["exits"]:
+            for direction, ex_obj in room.get_visible_exits(looker).items():
                 if not ex_obj.destination:
                     continue
-
-                match ex_obj.key:
-                    case "north":
-                        if (cur_y + 1) <= max_y:
-                            scan(ex_obj.destination, cur_x, cur_y + 1)
-                    case "south":
-                        if (cur_y - 1) >= min_y:
-                            scan(ex_obj.destination, cur_x, cur_y - 1)
-                    case "east":
-                        if (cur_x + 1) <= max_x:
-                            scan(ex_obj.destination, cur_x + 1, cur_y)
-                    case "west":
-                        if (cur_x - 1) >= min_x:
-                            scan(ex_obj.destination, cur_x - 1, cur_y)
-                    case "northeast":
-                        if ((cur_y + 1) <= max_y) and ((cur_x + 1) <= max_x):
-                            scan(ex_obj.destination, cur_x + 1, cur_y + 1)
-                    case "northwest":
-                        if ((cur_y + 1) <= max_y) and ((cur_x - 1) >= min_x):
-                            scan(ex_obj.destination, cur_x - 1, cur_y + 1)
-                    case "southeast":
-                        if ((cur_y - 1) >= min_y) and ((cur_x + 1) <= max_x):
-                            scan(ex_obj.destination, cur_x + 1, cur_y - 1)
-                    case "southwest":
-                        if ((cur_y - 1) >= min_y) and ((cur_x - 1) >= min_x):
-                            scan(ex_obj.destination, cur_x - 1, cur_y - 1)
+                x_off, y_off, z_off = direction.offset
+                if z_off or not (x_off or y_off):
+                    continue
+                new_x, new_y = cur_x + x_off, cur_y + y_off
+                if min_x <= new_x <= max_x and min_y <= new_y <= max_y:
+                    scan(ex_obj.destination, new_x, new_y)
 
         scan(self, 0, 0)
 
@@ -131,31 +175,31 @@ class AthanorRoom(AthanorObject, DefaultRoom):
       ||{S:^3}||
 """
 
+    # ExitDir -> (compass_template field, symbol)
+    compass_symbols = {
+        ExitDir.NORTH: ("N", " |cN|n "),
+        ExitDir.SOUTH: ("S", " |cS|n "),
+        ExitDir.UP: ("U", " |yU|n "),
+        ExitDir.DOWN: ("D", " |yD|n "),
+        ExitDir.EAST: ("E", "|cE|n  "),
+        ExitDir.WEST: ("W", "  |cW|n"),
+        ExitDir.NORTHWEST: ("NW", " |cNW|n"),
+        ExitDir.SOUTHWEST: ("SW", " |cSW|n"),
+        ExitDir.NORTHEAST: ("NE", "|cNE|n "),
+        ExitDir.SOUTHEAST: ("SE", "|cSE|n "),
+        ExitDir.INSIDE: ("I", " |MI|n "),
+        ExitDir.OUTSIDE: ("I", "|MOUT|n"),
+    }
+
     def generate_compass(self, looker):
-        con_map = self.get_visible_contents(looker)
-        compass_dict = defaultdict(str)
-
-        for ex in con_map["exits"]:
-            upper = ex.key.upper()
-            match ex.key:
-                case "north" | "south":
-                    compass_dict[upper[0]] = f" |c{upper[0]}|n "
-                case "up" | "down":
-                    compass_dict[upper[0]] = f" |y{upper[0]}|n "
-                case "east":
-                    compass_dict["E"] = "|cE|n  "
-                case "west":
-                    compass_dict["W"] = "  |cW|n"
-                case "northwest" | "southwest":
-                    compass_dict[upper[0] + upper[5]] = f" |c{upper[0] + upper[5]}|n"
-                case "northeast" | "southeast":
-                    compass_dict[upper[0] + upper[5]] = f"|c{upper[0] + upper[5]}|n "
-                case "inside":
-                    compass_dict["I"] = f" |MI|n "
-                case "outside":
-                    compass_dict["I"] = "|MOUT|n"
-
-        return self.compass_template.format_map(compass_dict).splitlines()
+        compass_dict = dict()
+
+        for direction in self.get_visible_exits(looker):
+            if symbol := self.compass_symbols.get(direction, None):
+                compass_dict[symbol[0]] = symbol[1]
+
+        compass = compile_template(self.compass_template)
+        return compass.render(compass_dict, default="").splitlines()
 
     def generate_map_legend(self, looker, **kwargs) -> list[str]:
         return []
@@ -206,10 +250,16 @@ class AthanorRoom(AthanorObject, DefaultRoom):
             compass_line = compass[i] if i < len(compass) else ""
             col_automap_line = col_automap[i] if i < len(col_automap) else ""
             map_legend_line = map_legend[i] if i < len(map_legend) else ""
-            sep1 = " " * (20 - len(ANSIString(compass_line)))
-            sep2 = " " * (14 - len(ANSIString(col_automap_line)))
-            line = " " + compass_line + sep1 + col_automap_line + sep2 + map_legend_line
-            out.append(line)
+            out.append(
+                "".join(
+                    (
+                        " ",
+                        ansi_ljust(compass_line, 20),
+                        ansi_ljust(col_automap_line, 14),
+                        map_legend_line,
+                    )
+                )
+            )
         return "\r\n".join(out)
 
     def get_list_display_for(self, obj, looker, **kwargs):
@@ -1,35 +1,63 @@
 import ipaddress
+import multiprocessing
+import threading
 import uuid
 import typing
 import random
 import string
-import yaml
-import orjson
 import re
 from datetime import datetime, timezone
 from collections import defaultdict
+from functools import lru_cache
 from pathlib import Path
 from django.conf import settings
 from rest_framework import status
+from athanor import datafiles
 from evennia import SESSION_HANDLER
 from evennia.utils.ansi import parse_ansi, ANSIString
 from evennia.utils.evtable import EvTable
 
 
+def _data_cache_dir():
+    # these helpers also run inside plugin init(), before settings are configured, and in games
+    # which don't use athanor.init().
+    return getattr(settings, "DATA_FILE_CACHE_DIR", None) if settings.configured else None
+
+
 def read_json_file(p: Path):
-    return orjson.loads(open(p, mode="rb").read())
+    return datafiles.parse_json(p)
 
 
 def read_yaml_file(p: Path):
-    return yaml.safe_load(open(p, mode="r"))
+    return datafiles.load(p, cache_dir=_data_cache_dir(), fmt="yaml")
+
+
+def read_jsonl_file(p: Path) -> typing.Iterator:
+    """
+    Streams the records of a JSON Lines file. See athanor.datafiles.iter_jsonl().
+    """
+    return datafiles.iter_jsonl(p)
 
 
 def read_data_file(p: Path):
-    if p.name.lower().endswith(".json"):
-        return read_json_file(p)
-    elif p.name.lower().endswith(".yaml"):
-        return read_yaml_file(p)
-    return None
+    return datafiles.load(p, cache_dir=_data_cache_dir())
+
+
+def import_data_directory(directory: Path, **kwargs) -> typing.Iterator[datafiles.DataFileResult]:
+    """
+    Parse every data file in a directory with a process pool, validating record names with
+    validate_name(). See athanor.datafiles.import_directory() for the arguments; pass
+    report=datafiles.ImportReport() to get totals and the slowest files.
+    """
+    if "mp_context" not in kwargs:
+        # the server runs threads, which a forked worker could inherit mid-lock.
+        kwargs["mp_context"] = multiprocessing.get_context(
+            "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        )
+    kwargs.setdefault("workers", settings.DATA_IMPORT_WORKERS)
+    kwargs.setdefault("cache_dir", _data_cache_dir())
+    kwargs.setdefault("validate", validate_name)
+    return datafiles.import_directory(directory, **kwargs)
 
 
 def fresh_uuid4(existing) -> uuid:
@@ -38,7 +66,8 @@ def fresh_uuid4(existing) -> uuid:
     Yes, I know this is silly. UUIDs are meant to be unique by sheer statistic unlikelihood of a conflict.
     I'm just that afraid of collisions.
     """
-    existing = set(existing)
+    if not isinstance(existing, (set, frozenset, dict)):
+        existing = set(existing)
     fresh_uuid = uuid.uuid4()
     while fresh_uuid in existing:
         fresh_uuid = uuid.uuid4()
@@ -87,12 +116,147 @@ def partial_match(
     return out if many_results else None
 
 
+_NAME_CHARACTERS = string.ascii_letters + string.digits
+
+
 def generate_name(prefix: str, existing, gen_length: int = 20) -> str:
+    """
+    Generates f"{prefix}_<random letters and digits>" which is not in existing. To hand out many
+    names, use an IdentifierAllocator instead.
+    """
+
     def gen():
-        return f"{prefix}_{''.join(random.choices(string.ascii_letters + string.digits, k=gen_length))}"
+        return f"{prefix}_{''.join(random.choices(_NAME_CHARACTERS, k=gen_length))}"
+
+    while (u := gen()) in existing:
+        pass
+    return u
+
 
-    while (u := gen()) not in existing:
-        return u
+class IdentifierAllocator:
+    """
+    Hands out identifiers which aren't used yet, for imports and the like which need a lot of them.
+
+    Identifiers in use are kept in a set which lives as long as the allocator does, so each
+    allocation is a set lookup rather than a scan. If the identifiers are also stored somewhere
+    else, such as a unique database column, pass probe: a callable which is given a list of
+    candidates and returns those which are taken. It is called once per batch, not once per
+    identifier.
+
+    Args:
+        generate (callable): Returns a new random candidate each time it is called.
+        existing (iterable, optional): Identifiers which are already used.
+        probe (callable, optional): See above.
+        max_attempts (int): Give up after this many rounds of collisions.
+    """
+
+    def __init__(
+        self,
+        generate: typing.Callable[[], typing.Hashable],
+        existing: typing.Iterable = (),
+        probe: typing.Optional[typing.Callable[[list], typing.Iterable]] = None,
+        max_attempts: int = 100,
+    ):
+        self.generate = generate
+        self.used = set(existing)
+        self.probe = probe
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_prefix(cls, prefix: str, gen_length: int = 20, **kwargs):
+        """
+        An allocator for generate_name() style names.
+        """
+        return cls(
+            lambda: f"{prefix}_{''.join(random.choices(_NAME_CHARACTERS, k=gen_length))}",
+            **kwargs,
+        )
+
+    @classmethod
+    def for_uuid4(cls, **kwargs):
+        return cls(uuid.uuid4, **kwargs)
+
+    @classmethod
+    def for_field(cls, model, field: str, generate: typing.Callable, preload: bool = False):
+        """
+        An allocator for values of a unique model field, which checks candidates against the
+        database. With preload, every existing value is loaded up front instead.
+        """
+        if preload:
+            return cls(generate, existing=model.objects.values_list(field, flat=True))
+
+        def probe(candidates: list):
+            # chunked, as SQLite limits how many parameters a query can have.
+            taken = list()
+            for i in range(0, len(candidates), 500):
+                taken.extend(
+                    model.objects.filter(
+                        **{f"{field}__in": candidates[i : i + 500]}
+                    ).values_list(field, flat=True)
+                )
+            return taken
+
+        return cls(generate, probe=probe)
+
+    def __contains__(self, identifier) -> bool:
+        return identifier in self.used
+
+    def __len__(self) -> int:
+        return len(self.used)
+
+    def reserve(self, *identifiers) -> list:
+        """
+        Mark identifiers as used.
+
+        Returns:
+            list: Those which were already used.
+        """
+        with self._lock:
+            taken = [i for i in identifiers if i in self.used]
+            self.used.update(identifiers)
+        return taken
+
+    def release(self, *identifiers):
+        """
+        Make identifiers available again, such as when the thing using one was deleted.
+        """
+        with self._lock:
+            self.used.difference_update(identifiers)
+
+    def allocate(self):
+        return self.allocate_many(1)[0]
+
+    def allocate_many(self, count: int) -> list:
+        """
+        Allocate count new identifiers at once.
+
+        Raises:
+            RuntimeError: If max_attempts rounds of candidates weren't enough, which means the
+                identifier space is nearly full.
+        """
+        out = list()
+        with self._lock:
+            for _attempt in range(self.max_attempts):
+                if (needed := count - len(out)) <= 0:
+                    return out
+                candidates = [
+                    c
+                    for c in dict.fromkeys(self.generate() for _ in range(needed))
+                    if c not in self.used
+                ]
+                if candidates and self.probe is not None:
+                    taken = set(self.probe(candidates))
+                    self.used.update(taken)
+                    candidates = [c for c in candidates if c not in taken]
+                self.used.update(candidates)
+                out.extend(candidates)
+            if len(out) >= count:
+                return out
+            self.used.difference_update(out)
+        raise RuntimeError(
+            f"Could not allocate {count} identifiers in {self.max_attempts} attempts."
+        )
 
 
 def iequals(first: str, second: str):
@@ -103,12 +267,70 @@ def utcnow():
     return datetime.now(timezone.utc)
 
 
+def ip_key(ip) -> str:
+    """
+    Turns an IP address into a fixed-width hex string which sorts in numeric order, so address
+    ranges can be found with an indexed BETWEEN. IPv4 addresses are keyed as IPv4-mapped IPv6
+    addresses so that both kinds share one column.
+    """
+    address = ipaddress.ip_address(ip)
+    if address.version == 4:
+        address = ipaddress.IPv6Address(f"::ffff:{address}")
+    return f"{int(address):032x}"
+
+
+def ip_key_range(network) -> tuple[str, str]:
+    """
+    The first and last ip_key() of a network such as "10.0.0.0/8" or "2001:db8::/32".
+    """
+    network = ipaddress.ip_network(network, strict=False)
+    return ip_key(network.network_address), ip_key(network.broadcast_address)
+
+
 class SafeDict(dict):
     def __missing__(self, key):
         return "{" + key + "}"
 
 
 RE_STAT_NAME = re.compile(r"^[a-zA-Z0-9_ \-,.']+$")
+RE_SPACES = re.compile(r" {2,}")
+
+def squish_spaces(text: str) -> str:
+    """
+    Collapses every run of spaces into one, in a single pass.
+    """
+    if "   " in text:
+        return RE_SPACES.sub(" ", text)
+    if "  " in text:
+        # only pairs, which one replace() handles faster than the regex.
+        return text.replace("  ", " ")
+    return text
+
+
+@lru_cache(maxsize=256)
+def _compile_matcher(pattern: str) -> re.Pattern:
+    return re.compile(pattern)
+
+
+def _matcher(matcher) -> re.Pattern:
+    """
+    Accepts a compiled regex or a pattern string, which is compiled once.
+    """
+    if isinstance(matcher, str):
+        return _compile_matcher(matcher)
+    return matcher
+
+
+def _clean_name(name: str, thing_type: str, match) -> tuple[str, typing.Optional[str]]:
+    """
+    The cleaned name, and the reason it is invalid or None.
+    """
+    name = squish_spaces(name.strip())
+    if not name:
+        return name, f"{thing_type} name cannot be empty."
+    if not match(name):
+        return name, f"{thing_type} contains forbidden characters."
+    return name, None
 
 
 def validate_name(
@@ -125,7 +347,7 @@ def validate_name(
     Args:
         name (str): The input value.
         thing_type (str): The name of the type of thing being provided. used for errors.
-        matcher (regex): The regex to match against.
+        matcher (regex or str): The regex to match against.
 
     Returns:
         str: The cleaned name.
@@ -133,17 +355,46 @@ def validate_name(
     Raises:
         ValueError: With the error message.
     """
-    name = name.strip()
-    # remove all double-spaces.
-    while "  " in name:
-        name = name.replace("  ", " ")
-    if not name:
-        raise ex_type(f"{thing_type} name cannot be empty.")
-    if not matcher.match(name):
-        raise ex_type(f"{thing_type} contains forbidden characters.")
+    name, error = _clean_name(name, thing_type, _matcher(matcher).match)
+    if error:
+        raise ex_type(error)
     return name
 
 
+def validate_names(
+    names: typing.Iterable[str],
+    thing_type: str = "Stat",
+    matcher=RE_STAT_NAME,
+    ex_type: Exception = ValueError,
+    errors: typing.Optional[list] = None,
+) -> list[str]:
+    """
+    validate_name() for many names at once, such as every name in an imported dataset.
+
+    Args:
+        names (iterable of str): The input values.
+        errors (list, optional): If given, invalid names don't raise. Instead, (index, message) is
+            appended to it for each one and the name is left out of the result.
+
+    Returns:
+        list[str]: The cleaned names, in order.
+
+    Raises:
+        ValueError: On the first invalid name, unless errors is given.
+    """
+    match = _matcher(matcher).match
+    out = list()
+    for i, name in enumerate(names):
+        name, error = _clean_name(name, thing_type, match)
+        if not error:
+            out.append(name)
+        elif errors is None:
+            raise ex_type(error)
+        else:
+            errors.append((i, error))
+    return out
+
+
 def online_characters():
     from .playviews import DefaultPlayview
 
@@ -317,3 +568,7 @@ def increment_playtime():
 
     for account, characters in accounts.items():
         account.increment_playtime(settings.PLAYTIME_INTERVAL, characters)
+
+    from athanor.playtime.history import PLAYTIME_HISTORY
+
+    PLAYTIME_HISTORY.flush_due()
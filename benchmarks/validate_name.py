@@ -0,0 +1,80 @@
+"""
+Times athanor.utils.validate_name() and validate_names() on ordinary and pathological names,
+next to the replace()-loop squishing validate_name() used to do.
+
+athanor.utils needs Django configured, so run it from a game directory, where the game's
+settings are found as server.conf.settings:
+
+    python path/to/benchmarks/validate_name.py [--number N]
+
+Set DJANGO_SETTINGS_MODULE to use other settings.
+"""
+import argparse
+import os
+import sys
+import timeit
+
+import django
+
+sys.path.insert(0, os.getcwd())
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "server.conf.settings")
+django.setup()
+
+import evennia
+
+evennia._init()
+
+from athanor.utils import RE_STAT_NAME, validate_name, validate_names
+
+
+def loop_validate_name(name: str) -> str:
+    # the old implementation, for comparison.
+    name = name.strip()
+    while "  " in name:
+        name = name.replace("  ", " ")
+    if not name:
+        raise ValueError("Stat name cannot be empty.")
+    if not RE_STAT_NAME.match(name):
+        raise ValueError("Stat contains forbidden characters.")
+    return name
+
+
+CASES = {
+    "ordinary": "Strength Score",
+    "one double space": "Strength  Score",
+    "10k spaces in one run": "a" + " " * 10_000 + "b",
+    "1M spaces in one run": "a" + " " * 1_000_000 + "b",
+    "5000 double-space pairs": ("a" + "  ") * 5000 + "b",
+    "5000 runs of seven spaces": ("a" + " " * 7) * 5000 + "b",
+}
+
+
+def _time(func, number: int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=3)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--number", type=int, default=200, help="calls per measurement")
+    args = parser.parse_args()
+
+    print(f"{'Input':<28} {'replace() loop':>15} {'validate_name':>15}")
+    for label, name in CASES.items():
+        assert loop_validate_name(name) == validate_name(name)
+        # keep the huge inputs from taking minutes.
+        number = max(1, args.number // (100 if len(name) > 100_000 else 1))
+        old = _time(lambda: loop_validate_name(name), number)
+        new = _time(lambda: validate_name(name), number)
+        print(f"{label:<28} {old * 1e6:>13.1f}us {new * 1e6:>13.1f}us")
+
+    names = [f"Stat {i}" for i in range(10_000)] + list(CASES.values())
+    single = _time(lambda: [validate_name(n) for n in names], 5)
+    batch = _time(lambda: validate_names(names), 5)
+    print(
+        f"\n{len(names)} names: validate_name() each {single * 1e3:.1f}ms, "
+        f"validate_names() {batch * 1e3:.1f}ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
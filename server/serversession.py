@@ -4,6 +4,7 @@ from evennia.server.serversession import ServerSession
 
 from athanor.error import AthanorTraceback
 from athanor.playviews import DefaultPlayview
+from server.sessionhandler import RESYNC
 
 _FUNCPARSER = None
 
@@ -51,7 +52,11 @@ class AthanorServerSession(ServerSession):
 
     @puid.setter
     def puid(self, value):
-        if value is not None:
+        if value is not None and (playview := RESYNC.take(value)) is not None:
+            # prefetched by AthanorServerSessionHandler, which saves account fixes in bulk.
+            self.playview = playview
+            RESYNC.rejoin(playview, self)
+        elif value is not None:
             obj = evennia.ObjectDB.objects.get(id=value)
             playview = obj.playview
             self.playview = playview
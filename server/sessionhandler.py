@@ -0,0 +1,75 @@
+from evennia.server.sessionhandler import ServerSessionHandler
+
+
+class PlayviewResync:
+    """
+    Holds the playviews prefetched for a portal resync, so AthanorServerSession.puid can pick
+    them up instead of querying for each session.
+    """
+
+    def __init__(self):
+        self.playviews = None
+        self.unsaved = list()
+
+    @property
+    def active(self) -> bool:
+        return self.playviews is not None
+
+    def prefetch(self, puids):
+        from athanor.playviews.models import PlayviewDB
+
+        # not DefaultPlayview.objects, which would only find playviews of exactly that typeclass.
+        self.playviews = {
+            playview.pk: playview
+            for playview in PlayviewDB.objects.filter(id__in=puids).select_related(
+                "id", "account", "db_puppet"
+            )
+        }
+        self.unsaved = list()
+
+    def take(self, puid):
+        if not self.playviews:
+            return None
+        return self.playviews.get(puid, None)
+
+    def rejoin(self, playview, session):
+        """
+        Rejoin at once, so that at_sync() and the post-sync hooks see the session in its playview,
+        but leave saving corrected character accounts to finish().
+        """
+        playview.rejoin_session(session, unsaved=self.unsaved)
+
+    def finish(self):
+        from evennia.objects.models import ObjectDB
+
+        unsaved, self.unsaved, self.playviews = self.unsaved, list(), None
+        if unsaved:
+            ObjectDB.objects.bulk_update(unsaved, ["db_account"])
+
+
+RESYNC = PlayviewResync()
+
+
+class AthanorServerSessionHandler(ServerSessionHandler):
+    """
+    Resyncs sessions after a reload with one query for all of their playviews, instead of two
+    queries per session. Set SERVER_SESSION_HANDLER_CLASS to use it.
+
+    Each session rejoins its playview as soon as its puid is loaded, before at_sync(),
+    at_post_portal_sync() and the restart announcement run. Only the saving of corrected
+    character accounts waits until the end, to be done in one query.
+    """
+
+    def portal_sessions_sync(self, portalsessionsdata):
+        puids = {
+            puid
+            for sessdict in portalsessionsdata.values()
+            if (puid := sessdict.get("puid", None))
+        }
+        if not puids:
+            return super().portal_sessions_sync(portalsessionsdata)
+        RESYNC.prefetch(puids)
+        try:
+            return super().portal_sessions_sync(portalsessionsdata)
+        finally:
+            RESYNC.finish()